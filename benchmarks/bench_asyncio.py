@@ -0,0 +1,37 @@
+"""
+Benchmark of asyncio throughput, with and without tracing of a coroutine function by framed().
+
+Run with : python -m benchmarks.bench_asyncio
+"""
+import asyncio
+import time
+
+from framable.framablefunctionwrapper import framed
+
+
+async def myfun(a: int) -> int:
+    await asyncio.sleep(0)
+    return a + 1
+
+
+async def gather(fun, tasks):
+    return await asyncio.gather(*(fun(a) for a in range(tasks)))
+
+
+def throughput(fun, tasks=10000, repeat=5):
+    """ Returns the best throughput, in tasks per second """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        asyncio.run(gather(fun, tasks))
+        best = min(best, time.perf_counter() - start)
+    return tasks / best
+
+
+if __name__ == "__main__":
+
+    plain = throughput(myfun)
+    traced = throughput(framed()(myfun))
+
+    print(f"unwrapped coroutine : {plain:12.0f} tasks/s")
+    print(f"framed coroutine    : {traced:12.0f} tasks/s  ({traced / plain:.0%})")
@@ -0,0 +1,78 @@
+"""
+Micro-benchmark of the per-call overhead of framed() functions, compared to unwrapped ones.
+
+Run with : python -m benchmarks.bench_framablefunctionwrapper
+"""
+import timeit
+
+import wrapt
+
+from framable.core import framableswitch
+from framable.core.framablesampler import EverySampler
+from framable.framablefunctionwrapper import framed, signature_tuple
+
+
+def myfun(a: int, b: int = 39, *args, c: int = 3, **kwargs) -> int:
+    return a + b + c
+
+
+def inc(a: int) -> int:
+    return a + 1
+
+
+def bench(stmt, number=100000, **globs):
+    """ Returns the best time per call, in microseconds """
+    timer = timeit.Timer(stmt, globals=globs)
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e6
+
+
+if __name__ == "__main__":
+
+    tracedfun = framed()(myfun)
+    sig, argtuple, argbinder, _, _ = signature_tuple(myfun)
+
+    plain = bench("myfun(1, 2, 3, c=4, d=5)", myfun=myfun)
+    binder = bench("argbinder(1, 2, 3, c=4, d=5)", argbinder=argbinder)
+    sigbind = bench(
+        "argtuple(**sig.bind(1, 2, 3, c=4, d=5).arguments)", sig=sig, argtuple=argtuple
+    )
+    traced = bench("tracedfun(1, 2, 3, c=4, d=5)", tracedfun=tracedfun)
+
+    @wrapt.decorator
+    def passthrough(wrapped, instance, args, kwargs):
+        return wrapped(*args, **kwargs)
+
+    wraptfun = passthrough(myfun)
+    # a sampler that never records, to measure the cost of the not-sampled path
+    skippedfun = framed(sample=EverySampler(10 ** 9))(myfun)
+    skippedfun(1)  # first call is recorded
+    wrapt_plain = bench("wraptfun(1, 2, 3, c=4, d=5)", wraptfun=wraptfun)
+    skipped = bench("skippedfun(1, 2, 3, c=4, d=5)", skippedfun=skippedfun)
+    timedfun = framed(timing=True)(myfun)
+    timed = bench("timedfun(1, 2, 3, c=4, d=5)", timedfun=timedfun)
+
+    # disabled, for this function only, then for the whole process
+    disabledfun = framed(enabled=False)(myfun)
+    disabled = bench("disabledfun(1, 2, 3, c=4, d=5)", disabledfun=disabledfun)
+    framableswitch.disable()
+    switched = bench("tracedfun(1, 2, 3, c=4, d=5)", tracedfun=tracedfun)
+    framableswitch.enable()
+
+    # looking up one call among a million, by its arguments (the first lookup builds the index)
+    tracedinc = framed()(inc)
+    for a in range(10 ** 6):
+        tracedinc(a)
+    trace = tracedinc.__trace__
+    trace[0]
+    lookup = bench("trace[424242]", trace=trace)
+
+    print(f"unwrapped call            : {plain:8.3f} us")
+    print(f"compiled argument binding : {binder:8.3f} us")
+    print(f"inspect.Signature.bind    : {sigbind:8.3f} us")
+    print(f"framed call               : {traced:8.3f} us  (overhead {traced - plain:8.3f} us)")
+    print(f"wrapt passthrough call    : {wrapt_plain:8.3f} us  (overhead {wrapt_plain - plain:8.3f} us)")
+    print(f"framed call, not sampled  : {skipped:8.3f} us  (overhead {skipped - plain:8.3f} us)")
+    print(f"framed call, timed        : {timed:8.3f} us  (timing {timed - traced:8.3f} us)")
+    print(f"framed call, disabled     : {disabled:8.3f} us  (vs wrapt {(disabled / wrapt_plain - 1) * 100:+6.1f} %)")
+    print(f"framed call, all disabled : {switched:8.3f} us  (vs wrapt {(switched / wrapt_plain - 1) * 100:+6.1f} %)")
+    print(f"trace lookup, 1M calls    : {lookup:8.3f} us")
@@ -0,0 +1,68 @@
+"""
+Micro-benchmark of framable classes construction and memory, compared to typing.NamedTuple.
+
+Run with : python -m benchmarks.bench_framablemeta
+"""
+import timeit
+import tracemalloc
+import typing
+
+from framable import FramableMeta
+
+
+class MyNamedTuple(typing.NamedTuple):
+    att1: int = 0
+    att2: float = 0.0
+    att3: str = ""
+
+
+class MyKls(metaclass=FramableMeta):
+    att1: int = 0
+    att2: float = 0.0
+    att3: str = ""
+
+
+class MyCompactKls(metaclass=FramableMeta, compact=True):
+    att1: int = 0
+    att2: float = 0.0
+    att3: str = ""
+
+
+class MyFlyweightKls(metaclass=FramableMeta, flyweight=True):
+    att1: int = 0
+    att2: float = 0.0
+    att3: str = ""
+
+
+def bench(stmt, number=100000, **globs):
+    """ Returns the best time per call, in microseconds """
+    timer = timeit.Timer(stmt, globals=globs)
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e6
+
+
+def memory(kls, number=100000):
+    """ Returns the memory taken by one instance, in bytes, including its values and its row in the class frame """
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    instances = [kls(att1=i + 1000, att2=i * 0.5, att3="alice") for i in range(number)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    return (size - instances.__sizeof__()) / number
+
+
+if __name__ == "__main__":
+
+    for name, kls in (
+        ("typing.NamedTuple", MyNamedTuple),
+        ("FramableMeta", MyKls),
+        ("FramableMeta, compact", MyCompactKls),
+        ("FramableMeta, flyweight", MyFlyweightKls),
+    ):
+        size = memory(kls)  # first, so the class frame storage is not reallocated from a large size
+        construction = bench("kls(att1=42, att2=0.5, att3='alice')", kls=kls)
+        access = bench("inst.att1", inst=kls(att1=42, att2=0.5, att3="alice"), number=1000000)
+        print(
+            f"{name:24}: construction {construction:6.3f} us, field access {access * 1000:6.1f} ns, "
+            f"{size:6.1f} bytes per instance"
+        )
@@ -1,7 +1,17 @@
-from .framablemeta import FramableMeta
-from .framablebase import FramableBase
+from .core.framablemeta import FramableMeta
+from .core.framableswitch import disable, enable, is_enabled
+from .framablecollector import FramableCollector
+from .framableinstrument import instrument, uninstrument
+from .framablestore import load_frame, save_frame
 
 __all__ = [
+    "FramableCollector",
     "FramableMeta",
-    "FramableBase"
+    "disable",
+    "enable",
+    "instrument",
+    "is_enabled",
+    "load_frame",
+    "save_frame",
+    "uninstrument",
 ]
@@ -0,0 +1,838 @@
+import array
+import bisect
+import heapq
+import itertools
+import operator
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import weakref
+
+
+class _Segment:
+    """ Records appended by one thread, in sequence order.
+
+    Only the owner thread appends, and readers only take snapshots, so no lock is needed (list.append is atomic).
+    """
+
+    __slots__ = ("thread", "seqs", "records")
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.seqs = []
+        self.records = []
+
+    @property
+    def count(self):
+        """ Number of records ever appended """
+        return len(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def append(self, seq, record):
+        """ Appending a record, and returning its position in the segment """
+        pos = len(self.records)
+        self.seqs.append(seq)
+        self.records.append(record)  # last, so a reader seeing the record also sees its sequence number
+        return pos
+
+    def extend(self, seqs, columns):
+        """ Appending records given column by column, and returning the position of the first one """
+        pos = len(self.records)
+        self.seqs.extend(seqs)
+        self.records.extend(zip(*columns))
+        return pos
+
+    def get(self, pos):
+        """ Returning (seq, thread, record) at pos, or None if it is not retained """
+        if pos < len(self.records):
+            return self.seqs[pos], self.thread, self.records[pos]
+
+    def valid(self, pos):
+        return True
+
+    def snapshot(self):
+        """ Returning sequence numbers and records, oldest first """
+        n = len(self.records)
+        return self.seqs[:n], self.records[:n]
+
+
+class _RingSegment:
+    """ Last maxlen records appended by all threads, in a preallocated ring shared by them.
+
+    A record is at the slot of its sequence number modulo maxlen, so the ring is bounded whatever the number of threads.
+    Sequence numbers are the positions of the records. Each slot holds (seq, thread, record), assigned at once,
+    so readers never see a half-written slot, and writers take no lock.
+    """
+
+    __slots__ = ("maxlen", "slots", "count")
+
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self.slots = [None] * maxlen
+        self.count = 0  # the last sequence number written, plus one
+
+    def __len__(self):
+        return min(self.count, self.maxlen)
+
+    def append(self, seq, record):
+        """ Overwriting the record maxlen sequence numbers older, and returning the position of the new one """
+        self.slots[seq % self.maxlen] = (seq, threading.get_ident(), record)
+        if seq >= self.count:  # a writer preempted since it took its sequence number may write after newer ones
+            self.count = seq + 1
+        return seq
+
+    def extend(self, seqs, columns):
+        """ Appending records given column by column, and returning the position of the first one.
+        Other threads may take sequence numbers in between, so the others do not always follow it.
+        """
+        for seq, record in zip(seqs, zip(*columns)):
+            self.append(seq, record)
+        return seqs[0] if len(seqs) else self.count
+
+    def get(self, pos):
+        """ Returning (seq, thread, record) at pos, or None if it is not retained """
+        slot = self.slots[pos % self.maxlen]
+        if slot is not None and slot[0] == pos:
+            return slot
+
+    def valid(self, pos):
+        return pos >= self.count - self.maxlen
+
+    def snapshot(self):
+        """ Returning sequence numbers, threads and records of the last maxlen records, oldest first """
+        oldest = self.count - self.maxlen
+        slots = sorted((s for s in list(self.slots) if s is not None and s[0] >= oldest), key=operator.itemgetter(0))
+        return [s[0] for s in slots], [s[1] for s in slots], [s[2] for s in slots]
+
+
+class _BoolArray(array.array):
+    """ Array of booleans, stored as bytes. Only bools are accepted, any other value raises TypeError,
+    so the column falls back to python objects instead of recording 2 as True.
+    """
+
+    def append(self, value):
+        if type(value) is not bool:
+            raise TypeError(f"Expected a bool, not {type(value).__name__}")
+        super(_BoolArray, self).append(value)
+
+    def extend(self, values):
+        values = list(values)
+        if any(type(v) is not bool for v in values):
+            raise TypeError("Expected bools only")
+        super(_BoolArray, self).extend(values)
+
+    def tolist(self):
+        return [bool(v) for v in super(_BoolArray, self).tolist()]
+
+
+def _new_array(typecode):
+    """ Returning an empty typed array for a numpy typecode """
+    return _BoolArray("B") if typecode == "?" else array.array(typecode)
+
+
+class _ColumnSegment:
+    """ Records appended by one thread, in sequence order, stored column by column.
+
+    Columns with a typecode are stored in typed arrays, holding raw values instead of python objects.
+    A typed column falls back to a list of python objects if a value does not fit its type.
+    Sequence numbers are appended last, so a reader never sees more sequence numbers than values in any column.
+    """
+
+    __slots__ = ("thread", "typecodes", "seqs", "columns")
+
+    def __init__(self, thread, typecodes):
+        self.thread = thread
+        self.typecodes = typecodes
+        self.seqs = array.array("q")
+        self.columns = self._new_columns()
+
+    def _new_columns(self):
+        return [[] if tc is None else _new_array(tc) for tc in self.typecodes]
+
+    @property
+    def count(self):
+        """ Number of records ever appended """
+        return len(self.seqs)
+
+    def __len__(self):
+        return len(self.seqs)
+
+    @staticmethod
+    def _grow(column, value):
+        """ Returning a new column with the value appended, when it cannot be appended in place """
+        if isinstance(column, array.array):
+            try:
+                # an array with a frame viewing it cannot be resized, so it is copied
+                column = type(column)(column.typecode, column)
+                column.append(value)
+                return column
+            except (TypeError, OverflowError):
+                column = column.tolist()  # value doesnt fit the type, falling back to python objects
+        column.append(value)
+        return column
+
+    def append(self, seq, record):
+        """ Appending a record, and returning its position in the segment """
+        pos = len(self.seqs)
+        try:
+            for column, value in zip(self.columns, record):
+                column.append(value)
+        except (BufferError, TypeError, OverflowError):
+            for i, value in enumerate(record):
+                if len(self.columns[i]) == pos:  # not appended yet
+                    self.columns[i] = self._grow(self.columns[i], value)
+        try:
+            self.seqs.append(seq)
+        except BufferError:
+            self.seqs = self._grow(self.seqs, seq)
+        return pos
+
+    @staticmethod
+    def _extend(column, values, typecode):
+        """ Returning the column with the values appended, which may be a new column """
+        if isinstance(column, array.array):
+            size = len(column)
+            try:
+                dtype = getattr(values, "dtype", None)
+                if dtype is not None and dtype == _dtype(typecode):
+                    column.frombytes(values.tobytes())  # numpy array of the same type, no conversion needed
+                else:
+                    column.extend(values)
+                return column
+            except BufferError:
+                # an array with a frame viewing it cannot be resized, so it is copied
+                column = type(column)(column.typecode, column)
+            except (TypeError, OverflowError):
+                del column[size:]  # some values may have been appended before the failing one
+                column = column.tolist()  # values dont fit the type, falling back to python objects
+            return _ColumnSegment._extend(column, values, typecode)
+        column.extend(values)
+        return column
+
+    def extend(self, seqs, columns):
+        """ Appending records given column by column, and returning the position of the first one """
+        pos = len(self.seqs)
+        for i, values in enumerate(columns):
+            self.columns[i] = self._extend(self.columns[i], values, self.typecodes[i])
+        self.seqs = self._extend(self.seqs, seqs, "q")
+        return pos
+
+    def value(self, pos, i):
+        """ Returning the value of the i-th field of the record at pos """
+        column = self.columns[i]
+        return bool(column[pos]) if isinstance(column, _BoolArray) else column[pos]
+
+    def get(self, pos):
+        """ Returning (seq, thread, record) at pos, or None if it is not retained """
+        if pos < len(self.seqs):
+            return self.seqs[pos], self.thread, tuple(bool(c[pos]) if isinstance(c, _BoolArray) else c[pos] for c in self.columns)
+
+    def valid(self, pos):
+        return True
+
+    def snapshot(self):
+        """ Returning sequence numbers and columns, oldest first.
+        Typed columns are numpy arrays viewing the segment storage, without copy.
+        """
+        import numpy as np
+
+        n = len(self.seqs)
+        columns = [
+            _readonly(np.frombuffer(c, dtype=_dtype(tc), count=n)) if isinstance(c, array.array) else c[:n]
+            for c, tc in zip(self.columns, self.typecodes)
+        ]
+        return _readonly(np.frombuffer(self.seqs, dtype="int64", count=n)), columns
+
+
+class _SpillSegment(_ColumnSegment):
+    """ Column segment writing its records to files, every spill_after records, to keep memory bounded.
+
+    Typed columns are appended to raw files, which are read back as read-only numpy memory maps.
+    Values that dont fit the type are written as 0 in the raw file, and kept aside, with their position,
+    in a sidecar file. A typed column with only None as misfits is read as a nullable (masked) array,
+    without copy of the raw values. Other misfits make the column python objects when the frame is read.
+    Other columns are appended to files in pickled chunks, and unpickled on read.
+    A chunk that cannot be pickled stays in memory.
+
+    The segment lock is taken on append and on read, as records move from memory to files.
+    Reading doesnt spill : records still in memory are read from memory, so the frame is a copy of
+    the files, unless all records are spilled (see FramableColumnBuffer.spill).
+    """
+
+    __slots__ = ("path", "spill_after", "spilled", "chunks", "misfits", "lock", "_maps", "_chunk")
+
+    def __init__(self, thread, typecodes, path, spill_after):
+        super(_SpillSegment, self).__init__(thread, typecodes)
+        self.path = path
+        self.spill_after = spill_after
+        self.spilled = 0
+        # for each untyped column, in order : (first position, count, kind, location)
+        self.chunks = [[] for _ in typecodes]
+        # for each typed column, in order : (positions, location in the sidecar file)
+        self.misfits = [[] for _ in typecodes]
+        self.lock = threading.Lock()
+        self._maps = {}  # memory maps of raw files, until the next spill
+        self._chunk = None  # last chunk read by get() or value(), as (column, first position, values)
+
+    @property
+    def count(self):
+        return self.spilled + len(self.seqs)
+
+    def __len__(self):
+        return self.spilled + len(self.seqs)
+
+    def append(self, seq, record):
+        with self.lock:
+            pos = self.spilled + super(_SpillSegment, self).append(seq, record)
+            if len(self.seqs) >= self.spill_after:
+                self.spill()
+        return pos
+
+    def extend(self, seqs, columns):
+        with self.lock:
+            pos = self.spilled + super(_SpillSegment, self).extend(seqs, columns)
+            if len(self.seqs) >= self.spill_after:
+                self.spill()
+        return pos
+
+    def _file(self, name):
+        return f"{self.path}-{name}"
+
+    def _append_file(self, name, data):
+        """ Appending bytes to a file, and returning their location in it """
+        with open(self._file(name), "ab") as f:
+            offset = f.tell()
+            f.write(data)
+        return offset, len(data)
+
+    def _read_file(self, name, location):
+        with open(self._file(name), "rb") as f:
+            f.seek(location[0])
+            return f.read(location[1])
+
+    def _split(self, i, column, start):
+        """ Returning a typed array of the column values, with 0 instead of misfits, and the misfits positions and values """
+        if isinstance(column, array.array):
+            return column, array.array("q"), []
+        typed, positions, misfits = _new_array(self.typecodes[i]), array.array("q"), []
+        zero = False if self.typecodes[i] == "?" else 0
+        for pos, value in enumerate(column, start=start):
+            try:
+                typed.append(value)
+            except (TypeError, OverflowError):
+                typed.append(zero)
+                positions.append(pos)
+                misfits.append(value)
+        return typed, positions, misfits
+
+    def _spill_typed(self, i, column):
+        """ Appending a typed column to its raw file, and its misfits to the sidecar file """
+        typed, positions, misfits = self._split(i, column, self.spilled)
+        if positions:
+            self.misfits[i].append((positions, self._append_file(f"{i}.misfits", pickle.dumps(misfits))))
+        self._append_file(f"{i}.raw", typed.tobytes())
+
+    def _spill_objects(self, i, column):
+        """ Appending an untyped column to its file, in a pickled chunk """
+        try:
+            data = pickle.dumps(column, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:  # values that cannot be pickled are kept in memory
+            self.chunks[i].append((self.spilled, len(column), "memory", column))
+        else:
+            self.chunks[i].append((self.spilled, len(column), "pickle", self._append_file(f"{i}.pickle", data)))
+
+    def spill(self):
+        """ Moving records from memory to files. The lock must be held. """
+        n = len(self.seqs)
+        if not n:
+            return
+        for i, column in enumerate(self.columns):
+            if self.typecodes[i] is None:
+                self._spill_objects(i, column)
+            else:
+                self._spill_typed(i, column)
+        self._append_file("seq.raw", self.seqs.tobytes())
+        self.seqs = array.array("q")
+        self.columns = self._new_columns()  # typed again, even if the previous chunk fell back to python objects
+        self.spilled += n
+        self._maps = {}
+
+    def _map(self, name, dtype):
+        """ Returning the raw file as a read-only memory map, of the spilled records """
+        import numpy as np
+
+        if not self.spilled:
+            return np.empty(0, dtype=dtype)
+        if name not in self._maps:
+            self._maps[name] = np.memmap(self._file(name), dtype=dtype, mode="r", shape=(self.spilled,))
+        return self._maps[name]
+
+    def _load(self, name, kind, location):
+        """ Returning the values of a chunk, from the last one read if it is the same """
+        if kind == "memory":
+            return location
+        if self._chunk is None or self._chunk[0] != (name, location):
+            self._chunk = ((name, location), pickle.loads(self._read_file(name, location)))
+        return self._chunk[1]
+
+    def _value(self, pos, i):
+        """ Returning the value of the i-th field of the spilled record at pos. The lock must be held. """
+        if self.typecodes[i] is None:
+            chunks = self.chunks[i]
+            first, count, kind, location = chunks[bisect.bisect_right([c[0] for c in chunks], pos) - 1]
+            return self._load(f"{i}.pickle", kind, location)[pos - first]
+        for positions, location in self.misfits[i]:
+            if positions[0] <= pos <= positions[-1]:
+                j = bisect.bisect_left(positions, pos)
+                if positions[j] == pos:
+                    return self._load(f"{i}.misfits", "pickle", location)[j]
+        return self._map(f"{i}.raw", _dtype(self.typecodes[i]))[pos].item()
+
+    def value(self, pos, i):
+        with self.lock:
+            if pos >= self.spilled:
+                return super(_SpillSegment, self).value(pos - self.spilled, i)
+            return self._value(pos, i)
+
+    def get(self, pos):
+        if pos < self.count:
+            with self.lock:
+                if pos >= self.spilled:
+                    return super(_SpillSegment, self).get(pos - self.spilled)
+                seq = self._map("seq.raw", "int64")[pos].item()
+                return seq, self.thread, tuple(self._value(pos, i) for i in range(len(self.typecodes)))
+
+    def _typed_column(self, i, tail):
+        """ Returning a typed column, from its raw file and the records in memory """
+        import numpy as np
+
+        dtype = _dtype(self.typecodes[i])
+        values = self._map(f"{i}.raw", dtype)
+        positions, misfits = [], []
+        for chunkpositions, location in self.misfits[i]:
+            positions.extend(chunkpositions)
+            misfits.extend(self._load(f"{i}.misfits", "pickle", location))
+        tail, tailpositions, tailmisfits = self._split(i, tail, self.spilled)
+        positions.extend(tailpositions)
+        misfits.extend(tailmisfits)
+        if len(tail):
+            values = np.concatenate([values, np.frombuffer(tail, dtype=dtype)])
+        if not positions:
+            return values
+        if all(v is None for v in misfits):
+            import pandas as pd  # already imported to build the frame
+
+            mask = np.zeros(len(values), dtype=bool)
+            mask[positions] = True
+            masked = {"b": pd.arrays.BooleanArray, "f": pd.arrays.FloatingArray}.get(dtype.kind, pd.arrays.IntegerArray)
+            return masked(values, mask)  # values are not copied
+        objects = values.astype(object)  # other misfits are python objects, like in memory
+        objects[positions] = misfits
+        return objects
+
+    def snapshot(self):
+        """ Returning sequence numbers and columns, oldest first.
+        Typed columns are memory maps of the files, without copy, if all records are spilled.
+        """
+        import numpy as np
+
+        with self.lock:
+            n = len(self.seqs)
+            seqs = self._map("seq.raw", "int64")
+            if n:
+                seqs = np.concatenate([seqs, np.frombuffer(self.seqs, dtype="int64", count=n)])
+            columns = []
+            for i, tc in enumerate(self.typecodes):
+                tail = self.columns[i][:n]
+                if tc is not None:
+                    columns.append(self._typed_column(i, tail))
+                else:
+                    values = []
+                    for first, count, kind, location in self.chunks[i]:
+                        values.extend(self._load(f"{i}.pickle", kind, location))
+                    values.extend(tail)
+                    columns.append(values)
+            return seqs, columns
+
+
+def _dtype(typecode):
+    """ Returning the canonical numpy dtype for a typecode (eg. int64 instead of longlong for "q"), as pandas expects """
+    import numpy as np
+
+    dtype = np.dtype(typecode)
+    return np.dtype(f"{dtype.kind}{dtype.itemsize}")
+
+
+def _readonly(view):
+    """ Preventing writes to the buffer storage, through a frame """
+    view.flags.writeable = False
+    return view
+
+
+SPILL_AFTER = 1000000  # default number of records kept in memory (per thread) by buffers spilling to files
+
+
+class FramableBuffer:
+    """ Append-only storage for framable records, safe for concurrent writers.
+
+    Each thread appends to its own segment, which is as cheap as appending to a python list, and never takes a lock.
+    Each record gets a sequence number, from a counter global to the buffer.
+    Segments are merged, by sequence number, when the frame is read.
+    The DataFrame is then memoized with the generation (number of records appended) it was built for,
+    so it is only rebuilt when new records have arrived.
+    The frame index is the sequence number of each record.
+
+    Records are tuples (usually namedtuples) with values in the same order as fields.
+    If fields are not known in advance (fields=None), records are mappings, and columns are discovered as they come.
+    If threads is True, the frame has a last "thread" column, with the identifier of the thread that appended it.
+    Fields in categorical are categorical columns in the frame, for values repeated many times.
+    """
+
+    def __init__(self, fields=None, threads=False, categorical=()):
+        self._mapping = fields is None
+        self._fields = () if fields is None else tuple(fields)
+        self._threads = threads
+        self._categorical = frozenset(categorical)
+        self._seq = itertools.count()
+        self._local = threading.local()
+        self._segments = []
+        self._memo = (-1, None)  # (generation, frame), assigned at once so concurrent readers stay consistent
+
+    @property
+    def fields(self):
+        if self._mapping:
+            self._discover(self._snapshot()[2])
+        return self._fields
+
+    def _new_segment(self):
+        return _Segment(threading.get_ident())
+
+    def _thread_segment(self):
+        """ Returning the segment of the current thread """
+        try:
+            return self._local.segment
+        except AttributeError:  # first record from this thread
+            segment = self._local.segment = self._new_segment()
+            self._segments.append(segment)
+            return segment
+
+    def append(self, record):
+        """ Appending one record. Returns a handle to retrieve it later with take(). """
+        segment = self._thread_segment()
+        return segment, segment.append(next(self._seq), dict(record) if self._mapping else record)
+
+    def extend(self, columns):
+        """ Appending many records at once, given column by column, in the order of fields.
+        All columns must have the same length.
+        Returns a handle to the first record, the others follow it in the same segment.
+        """
+        if self._mapping:
+            raise TypeError("Records of a buffer without fields cannot be appended as columns")
+        if len(columns) != len(self._fields):
+            raise ValueError(f"Expected {len(self._fields)} columns, not {len(columns)}")
+        n = len(columns[0]) if columns else 0
+        if any(len(c) != n for c in columns):
+            raise ValueError("All columns must have the same length")
+        # sequence numbers of a segment only increase, even if other threads take some in between
+        segment = self._thread_segment()
+        return segment, segment.extend(array.array("q", itertools.islice(self._seq, n)), columns)
+
+    @property
+    def generation(self):
+        """ The number of records ever appended. """
+        return sum(s.count for s in list(self._segments))
+
+    def __len__(self):
+        return sum(len(s) for s in list(self._segments))
+
+    def _snapshot(self):
+        """ Returning sequence numbers, threads and records, from all segments, ordered by sequence number """
+        parts = [(s.thread,) + s.snapshot() for s in list(self._segments)]
+        if len(parts) == 1:
+            thread, seqs, records = parts[0]
+            return seqs, [thread] * len(seqs), records
+        merged = list(
+            heapq.merge(
+                *(zip(seqs, itertools.repeat(thread), records) for thread, seqs, records in parts),
+                key=operator.itemgetter(0),
+            )
+        )
+        return [m[0] for m in merged], [m[1] for m in merged], [m[2] for m in merged]
+
+    def _discover(self, records):
+        """ Adding fields of mapping records, as they come """
+        for record in records:
+            for f in record:
+                if f not in self._fields:
+                    self._fields += (f,)
+
+    def _columns(self, records):
+        if self._mapping:
+            self._discover(records)
+            return [[r.get(f) for r in records] for f in self._fields]
+        return [list(values) for values in zip(*records)] or [[] for _ in self._fields]
+
+    def _snapshot_columns(self):
+        """ Returning sequence numbers, threads and columns, from all segments, ordered by sequence number """
+        seqs, threads, records = self._snapshot()
+        return seqs, threads, self._columns(records)
+
+    def _dataframe(self, seqs, threads, columns):
+        import pandas as pd  # imported only when a frame is needed, it is slow to import
+
+        names = self._fields
+        if self._categorical:
+            columns = [pd.Categorical(c) if f in self._categorical else c for f, c in zip(names, columns)]
+        if self._threads:
+            columns = columns + [threads]
+            names += ("thread",)
+        # built from positions, since names may not be unique. copy=False keeps typed columns as views.
+        frame = pd.DataFrame(dict(enumerate(columns)), index=pd.Index(seqs, dtype="int64"), copy=False)
+        frame.columns = list(names)
+        return frame
+
+    def take(self, handles):
+        """ Building a DataFrame of the records with these handles only.
+        This is O(len(handles)), records that are not in the buffer anymore are ignored.
+        """
+        found = []
+        for segment, pos in handles:
+            item = segment.get(pos)
+            if item is not None:
+                found.append(item)
+        found.sort(key=operator.itemgetter(0))
+        return self._dataframe([f[0] for f in found], [f[1] for f in found], self._columns([f[2] for f in found]))
+
+    @property
+    def frame(self):
+        """ Building the DataFrame on demand, and memoizing it until new records arrive """
+        generation = self.generation  # before the snapshot, so a frame is never tagged newer than it is
+        memogen, frame = self._memo
+        if memogen != generation:
+            frame = self._dataframe(*self._snapshot_columns())
+            self._memo = (generation, frame)
+        return frame
+
+
+class FramableRingBuffer(FramableBuffer):
+    """ Fixed-capacity FramableBuffer, keeping only the last maxlen records.
+
+    Storage is preallocated, and records are overwritten in a circular fashion.
+    All threads append to the same ring, so at most maxlen records are kept, whatever the number of threads.
+    The frame index is the global sequence number of each record, so the recent window stays comparable.
+    """
+
+    def __init__(self, fields=None, maxlen=1024, threads=False, categorical=()):
+        if maxlen < 1:
+            raise ValueError(f"maxlen must be a positive integer, not {maxlen}")
+        super(FramableRingBuffer, self).__init__(fields, threads=threads, categorical=categorical)
+        self._maxlen = maxlen
+        self._ring = _RingSegment(maxlen)
+        self._segments.append(self._ring)
+
+    @property
+    def maxlen(self):
+        return self._maxlen
+
+    def _thread_segment(self):
+        return self._ring
+
+    def _snapshot(self):
+        return self._ring.snapshot()
+
+    @property
+    def frame(self):
+        """ Building the DataFrame on demand, and memoizing it until new records arrive.
+        Note the frame is only weakly memoized, so evicted records are not kept alive by a stale frame.
+        """
+        generation = self.generation
+        memogen, ref = self._memo
+        frame = ref() if ref is not None else None
+        if frame is None or memogen != generation:
+            frame = self._dataframe(*self._snapshot_columns())
+            self._memo = (generation, weakref.ref(frame))
+        return frame
+
+
+class FramableColumnBuffer(FramableBuffer):
+    """ FramableBuffer storing records column by column, with typed storage for numeric and boolean fields.
+
+    typecodes maps field names to the numpy typecode of their column, one of "?bBhHiIlLqQfd".
+    Typed columns are stored in python arrays, which need no numpy import to append to,
+    and take only the size of the raw values in memory.
+    Reading the frame views these arrays without copy, if all records come from one thread.
+    Records themselves are not kept, only their values.
+
+    If spill is specified (a directory, or True for the default temporary directory), records are moved to files
+    every spill_after records (per thread), and the frame maps these files in memory instead.
+    Records not spilled yet are read from memory, spill() moves them to files too.
+    The files are removed when the buffer is garbage collected.
+    """
+
+    def __init__(self, fields, typecodes, threads=False, spill=None, spill_after=SPILL_AFTER, categorical=()):
+        super(FramableColumnBuffer, self).__init__(fields, threads=threads, categorical=categorical)
+        self._typecodes = tuple(typecodes.get(f) for f in self._fields)
+        self._spilldir = None
+        if spill:
+            if spill_after < 1:
+                raise ValueError(f"spill_after must be a positive integer, not {spill_after}")
+            self._spilldir = tempfile.mkdtemp(prefix="framable-", dir=None if spill is True else spill)
+            self._spill_after = spill_after
+            self._segment_ids = itertools.count()
+            weakref.finalize(self, shutil.rmtree, self._spilldir, ignore_errors=True)
+
+    @property
+    def typecodes(self):
+        return {f: tc for f, tc in zip(self._fields, self._typecodes) if tc is not None}
+
+    @property
+    def spilled(self):
+        """ The number of records in files. """
+        return sum(getattr(s, "spilled", 0) for s in list(self._segments))
+
+    def spill(self):
+        """ Moving all records to files, so that the next frame maps them without copy """
+        for segment in list(self._segments):
+            if isinstance(segment, _SpillSegment):
+                with segment.lock:
+                    segment.spill()
+        self._memo = (-1, None)
+
+    def _new_segment(self):
+        if self._spilldir is not None:
+            path = os.path.join(self._spilldir, f"segment{next(self._segment_ids)}")
+            return _SpillSegment(threading.get_ident(), self._typecodes, path, self._spill_after)
+        return _ColumnSegment(threading.get_ident(), self._typecodes)
+
+    def _columns(self, records):
+        import numpy as np
+
+        columns = super(FramableColumnBuffer, self)._columns(records)
+        for i, tc in enumerate(self._typecodes):
+            if tc is not None:
+                typed = _new_array(tc)
+                try:
+                    typed.extend(columns[i])  # same checks as the storage, numpy would silently cast instead
+                except (TypeError, OverflowError):
+                    continue  # values not fitting the type are kept as python objects
+                columns[i] = np.frombuffer(typed, dtype=_dtype(tc)) if typed else np.empty(0, dtype=_dtype(tc))
+        return columns
+
+    def _snapshot(self):
+        seqs, threads, columns = self._snapshot_columns()
+        return list(seqs), threads, list(zip(*columns)) or [() for _ in seqs]
+
+    def _snapshot_columns(self):
+        import numpy as np
+
+        parts = [(s.thread,) + s.snapshot() for s in list(self._segments)]
+        if not parts:
+            return np.empty(0, dtype="int64"), [], self._columns([])
+        if len(parts) == 1:
+            thread, seqs, columns = parts[0]
+            return seqs, [thread] * len(seqs), columns
+
+        # merging segments by sequence number (this copies)
+        order = np.argsort(np.concatenate([p[1] for p in parts]), kind="stable")
+        threads = list(itertools.chain.from_iterable(itertools.repeat(p[0], len(p[1])) for p in parts))
+        columns = []
+        for i in range(len(self._fields)):
+            segcolumns = [p[2][i] for p in parts]
+            if all(isinstance(c, np.ndarray) for c in segcolumns):
+                columns.append(np.concatenate(segcolumns)[order])
+            elif not any(isinstance(c, list) for c in segcolumns):  # nullable arrays, from spilled segments
+                import pandas as pd  # already imported to build the frame
+
+                columns.append(pd.concat([pd.Series(c) for c in segcolumns], ignore_index=True).array[order])
+            else:
+                merged = list(itertools.chain.from_iterable(segcolumns))
+                columns.append([merged[o] for o in order])
+        return np.concatenate([p[1] for p in parts])[order], [threads[o] for o in order], columns
+
+
+_TYPECODES = {bool: "?", int: "q", float: "d", "bool": "?", "int": "q", "float": "d"}  # postponed annotations too
+
+
+def annotation_typecodes(annotations):
+    """ Mapping annotated fields to the typecode of their storage.
+    int, float and bool are supported, as well as numpy scalar types (numpy.int32, numpy.float64, etc.).
+    Postponed annotations (PEP 563) of int, float and bool are strings, they are supported too.
+    Fields with other annotations are stored as python objects, so they are not in the result.
+    """
+    codes = {}
+    for field, annotation in annotations.items():
+        try:
+            tc = _TYPECODES.get(annotation)
+        except TypeError:  # unhashable annotation
+            continue
+        if tc is None and getattr(annotation, "__module__", None) == "numpy":
+            import numpy as np  # already imported, since the annotation comes from it
+
+            try:
+                tc = np.dtype(annotation).char
+            except TypeError:
+                continue
+        if tc is not None and tc in "?bBhHiIlLqQfd":
+            codes[field] = tc
+    return codes
+
+
+def framable_buffer(
+    fields=None, maxlen=None, threads=False, typecodes=None, spill=None, spill_after=SPILL_AFTER, categorical=()
+):
+    """ Building an unbounded buffer, or a bounded one if maxlen is specified.
+    Unbounded buffers with typecodes store their records column by column, in typed storage.
+    Unbounded buffers can spill their records to files (see FramableColumnBuffer).
+    """
+    if maxlen is None:
+        if typecodes or spill:
+            return FramableColumnBuffer(
+                fields, typecodes or {}, threads=threads, spill=spill, spill_after=spill_after, categorical=categorical
+            )
+        return FramableBuffer(fields, threads=threads, categorical=categorical)
+    if spill:
+        raise ValueError("A bounded buffer keeps at most maxlen records, it cannot spill them to files")
+    return FramableRingBuffer(fields, maxlen=maxlen, threads=threads, categorical=categorical)
+
+
+if __name__ == "__main__":
+
+    buf = FramableBuffer(("a", "b"))
+    buf.append((42, "answer"))
+    buf.append((51, "other"))
+
+    print(buf.frame)
+    assert buf.frame is buf.frame  # cached until next append
+
+    recbuf = FramableBuffer()
+    recbuf.append({"a": 42})
+    recbuf.append({"a": 51, "b": "other"})
+
+    print(recbuf.frame)
+
+    ringbuf = FramableRingBuffer(("a",), maxlen=2)
+    for a in range(5):
+        ringbuf.append((a,))
+
+    print(ringbuf.frame)  # only the last 2 records, indexed by sequence number
+
+    colbuf = FramableColumnBuffer(("a", "b"), typecodes={"a": "q"})
+    colbuf.append((42, "answer"))
+    colbuf.append((51, "other"))
+
+    print(colbuf.frame.dtypes)  # a is stored, and read, as int64
+
+    colbuf.extend([[1, 2, 3], ["x", "y", "z"]])  # appending records column by column
+    print(colbuf.frame)
+
+    spillbuf = FramableColumnBuffer(("a", "b"), typecodes={"a": "q"}, spill=True, spill_after=2)
+    for a in range(5):
+        spillbuf.append((a, str(a)))
+
+    print(spillbuf.spilled, spillbuf.frame)  # the last record is still in memory, the frame copies
+    spillbuf.spill()
+    print(spillbuf.spilled, spillbuf.frame)  # column a is a memory map of the spill file
@@ -0,0 +1,91 @@
+"""
+Result caches, for traced functions declared pure.
+
+A pure function returns the same result for the same arguments, so the result of a recorded call
+can be returned again, without calling the function, when it is called with the same argtuple.
+"""
+import collections
+import threading
+import time
+
+
+class FramableCache:
+    """ Cache of results by argtuple, evicting the least recently used one when it has more than maxsize results.
+
+    If ttl is specified, results are only served for ttl seconds after they were cached.
+    Hits, misses, evictions and expirations are counted, and can be read as a frame.
+    The cache is updated under a lock, so concurrent calls dont lose results, nor counts.
+    """
+
+    def __init__(self, maxsize: int = None, ttl: float = None, clock=time.monotonic):
+        if maxsize is not None and maxsize < 1:
+            raise ValueError(f"maxsize must be a positive integer, not {maxsize}")
+        if ttl is not None and ttl <= 0:
+            raise ValueError(f"ttl must be positive, not {ttl}")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._results = collections.OrderedDict()  # argtuple -> (result, expiry), least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._results)
+
+    def __contains__(self, argt):
+        with self._lock:
+            item = self._results.get(argt)
+            return item is not None and (item[1] is None or item[1] > self._clock())
+
+    def __getitem__(self, argt):
+        """ Returning the cached result for argt, or raising KeyError. Raises TypeError if argt is not hashable. """
+        with self._lock:
+            item = self._results.get(argt)
+            if item is not None:
+                if item[1] is None or item[1] > self._clock():
+                    self._results.move_to_end(argt)
+                    self.hits += 1
+                    return item[0]
+                del self._results[argt]
+                self.expirations += 1
+            self.misses += 1
+        raise KeyError(argt)
+
+    def __setitem__(self, argt, result):
+        with self._lock:
+            self._results[argt] = (result, None if self.ttl is None else self._clock() + self.ttl)
+            self._results.move_to_end(argt)
+            if self.maxsize is not None and len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    @property
+    def frame(self):
+        """ The counters of the cache, in a one-row DataFrame """
+        import pandas as pd  # imported only when needed, it is slow to import
+
+        with self._lock:
+            counters = {
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "expirations": self.expirations, "size": len(self._results),
+            }
+        return pd.DataFrame([counters])
+
+
+if __name__ == "__main__":
+
+    cache = FramableCache(maxsize=2)
+    cache[(1,)] = 2
+    cache[(2,)] = 3
+    assert cache[(1,)] == 2
+    cache[(3,)] = 4  # evicting (2,), the least recently used one
+    assert (2,) not in cache
+
+    print(cache.frame)
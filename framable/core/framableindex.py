@@ -0,0 +1,128 @@
+"""
+Mapping views of buffers, looking up records by the values of their first fields.
+"""
+import collections.abc
+import copy
+import threading
+
+
+class FramableIndex(collections.abc.Mapping):
+    """ Mapping view of a buffer, from the first nkeys fields of its records to the field at position value.
+
+    Handles of the records are kept in a dict by key, so a lookup is O(1), whatever the size of the buffer.
+    The dict is updated with the new records on lookup, so appending to the buffer doesnt pay for it.
+    A key maps to the value of its last record, records that are not in the (bounded) buffer anymore are dropped.
+    Records with unhashable keys are not indexed.
+    """
+
+    def __init__(self, buffer, nkeys, value, keytype=None):
+        self._buffer = buffer
+        self._nkeys = nkeys
+        self._value = value
+        self._keytype = keytype  # keys of this type are complete, others are completed by _key()
+        self._prefix = ()
+        self._handles = {}  # key -> handles of its records, oldest first
+        self._indexed = {}  # segment -> number of its records already indexed
+        self._size = 0  # number of handles in the index
+        self._lock = threading.Lock()
+        self._root = self  # views update the index of their root, where the handles are counted
+
+    def prefixed(self, prefix):
+        """ Returning a view of the records with keys starting with prefix, looked up by the rest of their key """
+        view = copy.copy(self)  # sharing the index, and its root
+        view._prefix = self._prefix + tuple(prefix)
+        view._keytype = None
+        return view
+
+    def _key(self, key):
+        if self._keytype is not None and isinstance(key, self._keytype):
+            return key
+        if self._nkeys - len(self._prefix) == 1:  # a single field is looked up by its value
+            return self._prefix + (key,)
+        return self._prefix + tuple(key)
+
+    def _update(self):
+        """ Indexing records appended since the last update """
+        root = self._root
+        with root._lock:
+            for segment in list(root._buffer._segments):
+                start, count = root._indexed.get(segment, 0), segment.count
+                for pos in range(max(start, count - len(segment)), count):
+                    item = segment.get(pos)
+                    if item is None:  # overwritten since
+                        continue
+                    try:
+                        root._handles.setdefault(item[2][:root._nkeys], []).append((segment, pos))
+                    except TypeError:
+                        continue  # unhashable key
+                    root._size += 1
+                root._indexed[segment] = count
+            if root._size > 2 * len(root._buffer) + 1024:
+                root._prune()
+
+    def _prune(self):
+        """ Dropping handles of records not in the (bounded) buffer anymore. The lock must be held. """
+        self._size = 0
+        for key, handles in list(self._handles.items()):
+            handles = [h for h in handles if h[0].valid(h[1])]
+            if handles:
+                self._handles[key] = handles
+                self._size += len(handles)
+            else:
+                del self._handles[key]
+
+    def __getitem__(self, key):
+        key = self._key(key)
+        self._update()
+        for segment, pos in reversed(self._handles.get(key, ())):
+            item = segment.get(pos)
+            if item is not None:
+                return item[2][self._value]
+        raise KeyError(key)
+
+    def __iter__(self):
+        self._update()
+        n = len(self._prefix)
+        for key, handles in list(self._handles.items()):
+            if key[:n] == self._prefix and any(h[0].valid(h[1]) for h in reversed(handles)):
+                yield key[n:] if self._nkeys - n != 1 else key[n]
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def take(self, keys):
+        """ Building a DataFrame of all records with these keys, in sequence order """
+        self._update()
+        handles = []
+        for key in keys:
+            handles.extend(self._handles.get(self._key(key), ()))
+        return self._buffer.take(handles)
+
+    def between(self, low, high):
+        """ Building a DataFrame of all records with keys between low and high (included), in sequence order.
+        Keys that cannot be compared with low and high are ignored.
+        """
+        keys = []
+        for key in self:
+            try:
+                if low <= key <= high:
+                    keys.append(key)
+            except TypeError:
+                pass
+        return self.take(keys)
+
+
+if __name__ == "__main__":
+    from framable.core.framablebuffer import FramableBuffer
+
+    buf = FramableBuffer(("a", "b", "result"))
+    buf.append((1, "x", 42))
+    buf.append((2, "y", 51))
+    buf.append((1, "x", 43))
+
+    index = FramableIndex(buf, nkeys=2, value=2)
+    assert index[(1, "x")] == 43  # the last record with this key
+    assert (2, "y") in index
+
+    print(index.take([(1, "x")]))
+    print(index.prefixed((1,))["x"])
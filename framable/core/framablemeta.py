@@ -1,16 +1,139 @@
 import collections
+import collections.abc
+import itertools
+import operator
 import sys
 
-import pandas as pd
+from framable.core import framableswitch
+from framable.core.framablebuffer import SPILL_AFTER, FramableColumnBuffer, annotation_typecodes, framable_buffer
 
 
 # TODO : record the object address or full name, for reference in "foreign keys" later...
 
+
+_MISSING = object()
+
+
+def _filled(cls, field, column):
+    """ Replacing missing values in a column by the default value of the field """
+    if any(v is _MISSING for v in column):
+        if field not in cls._field_defaults:
+            raise TypeError(f"{cls.__name__} missing field {field}, which has no default value")
+        default = cls._field_defaults[field]
+        column = [default if v is _MISSING else v for v in column]
+    return column
+
+
+class FramableBatch(collections.abc.Sequence):
+    """ Instances created in bulk, built only when accessed.
+
+    Values are kept column by column, as they were given, and an instance is built (not recorded again)
+    each time one is accessed.
+    """
+
+    def __init__(self, cls, columns):
+        self._cls = cls
+        self._columns = columns
+
+    def __len__(self):
+        return len(self._columns[0]) if self._columns else 0
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return FramableBatch(self._cls, [c[item] for c in self._columns])
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("FramableBatch index out of range")
+        inst = self._cls._make(c[item] for c in self._columns)
+        inst.__init__()  # setting up the instance, without recording it again
+        return inst
+
+    def __repr__(self):
+        return f"<FramableBatch of {len(self)} {self._cls.__name__}>"
+
+
+class FramableRowBatch(FramableBatch):
+    """ Instances of a flyweight framable class created in bulk, as views of their rows in the class frame """
+
+    def __init__(self, cls, segment, positions):
+        self._cls = cls
+        self._segment = segment
+        self._positions = positions
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return FramableRowBatch(self._cls, self._segment, self._positions[item])
+        return self._cls._view(self._segment, self._positions[item])
+
+
+class FramableRow:
+    """ Instance of a flyweight framable class, a view of its row in the class frame.
+
+    It holds no values, fields are read from the columns of the class frame when accessed.
+    Otherwise it behaves like the namedtuple it stands for : iterable, indexable, and comparable to tuples.
+    """
+
+    __slots__ = ("_segment", "_pos")
+
+    @classmethod
+    def _view(cls, segment, pos):
+        row = object.__new__(cls)
+        row._segment = segment
+        row._pos = pos
+        return row
+
+    def __iter__(self):
+        return (self._segment.value(self._pos, i) for i in range(len(self._fields)))
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __getitem__(self, item):
+        return tuple(self)[item]
+
+    def __eq__(self, other):
+        if isinstance(other, (tuple, FramableRow)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{f}={v!r}' for f, v in zip(self._fields, self))})"
+
+    def _asdict(self):
+        return dict(zip(self._fields, self))
+
+
+def _row_field(i, typecode):
+    """ Building the property reading the i-th field of a row from the class frame """
+    if typecode == "?":  # stored as bytes, unless the column fell back to python objects
+        return property(lambda self: self._segment.value(self._pos, i), doc=f"Alias for field number {i}")
+    return property(lambda self: self._segment.columns[i][self._pos], doc=f"Alias for field number {i}")
+
+
 # _prohibited = ['__new__',]
 
 
 class FramableMeta(type):
-    def __new__(mcls, name, bases, ns):
+    """ Metaclass building framable classes, namedtuples recording their instances in a class frame.
+
+    maxlen bounds the class frame to the last maxlen instances.
+    compact classes have no instance __dict__ (__slots__ = ()), fields are read straight from the tuple,
+    like a typing.NamedTuple. Field defaults are then not accessible as class attributes.
+    flyweight classes keep values only in the class frame, their instances are FramableRow views of it.
+    They cannot be bounded by maxlen, as their instances would lose their values.
+    They are stored even while recording is disabled (see framableswitch), other instances are not.
+    spill moves the class frame to files in this directory (or a temporary one if True), every spill_after instances.
+    """
+
+    def __new__(mcls, name, bases, ns, maxlen=None, compact=False, flyweight=False,
+                spill=None, spill_after=SPILL_AFTER):
 
         # If called dynamically, some mandatory attributes might be missing:
 
@@ -53,30 +176,60 @@ class FramableMeta(type):
                                       module=ns['__module__'])
         Impl.__annotations__ = types
 
+        if flyweight:
+            if maxlen is not None or spill:
+                raise TypeError(f"Flyweight framable class {name} cannot have a maxlen or spill, "
+                                f"its instances are rows of the class frame in memory")
+            # instances are views of the class frame, the namedtuple is only used to check values
+            ns = {k: v for k, v in ns.items() if k not in types}
+            typecodes = annotation_typecodes(types)
+            ns.update({f: _row_field(i, typecodes.get(f)) for i, f in enumerate(Impl._fields)})
+            ns.update(__slots__=(), _tuple=Impl, _fields=Impl._fields, _field_defaults=Impl._field_defaults)
+            return super(FramableMeta, mcls).__new__(mcls, name, bases + (FramableRow,), ns)
+
+        if compact:
+            # field values are only in the tuple, class attributes would shadow them
+            ns = {k: v for k, v in ns.items() if k not in types}
+            ns['__slots__'] = ()
+
         return super(FramableMeta, mcls).__new__(mcls, name, bases + (Impl,), ns)
 
-    def __init__(cls, name, bases, ns):
+    def __init__(cls, name, bases, ns, maxlen=None, compact=False, flyweight=False,
+                 spill=None, spill_after=SPILL_AFTER):
         # leveraging inheritance for implementation, for simplicity reasons
         super(FramableMeta, cls).__init__(name, bases, ns)
 
-        # overriding __init__ for additional behavior (__new__ is reserved for namedtuple)
-        def init(s, *args, **kwargs):
-            super(cls, s).__init__()
-            for f in s._fields:
-                # replacing instance values with values from tuple (immutable) for consistency
-                setattr(s, f, getattr(super(cls, s), f))
-
-        cls.__init__ = init
-
-        cls._classframe = pd.DataFrame()  # empty dataframe on class creation
-
-        cls.__initial__ = cls()  # creating initial object on class creation
+        if not compact and not flyweight:
+            # overriding __init__ for additional behavior (__new__ is reserved for namedtuple)
+            def init(s, *args, **kwargs):
+                # replacing instance values with values from tuple (immutable) for consistency,
+                # as class attributes (field defaults) would shadow them otherwise
+                vars(s).update(zip(s._fields, s))
+
+            cls.__init__ = init
+
+        # empty buffer on class creation, frame built on demand. maxlen bounds it to the last instances.
+        # int, float and bool fields are stored in typed columns, and read without copy.
+        typecodes = annotation_typecodes(ns.get('__annotations__', {}))
+        if flyweight:
+            cls._classbuffer = FramableColumnBuffer(cls._fields, typecodes)  # storing values for the instances
+            # the initial object is a view of a segment of its own, so it is not in the frame
+            segment = cls._classbuffer._new_segment()
+            segment.append(-1, cls._tuple())
+            cls.__initial__ = cls._view(segment, 0)
+        else:
+            cls._classbuffer = framable_buffer(
+                cls._fields, maxlen=maxlen, typecodes=typecodes, spill=spill, spill_after=spill_after
+            )
+            cls.__initial__ = cls()  # creating initial object on class creation
 
         # setting up property to represent instance as a series
         def series(self):
+            import pandas as pd  # imported only when needed, it is slow to import
+
             if isinstance(self, dict):
                 return pd.Series(self)
-            elif isinstance(self, tuple) and hasattr(self, "_asdict"):
+            elif hasattr(self, "_asdict"):
                 return pd.Series(self._asdict())
             else:
                 return pd.Series(vars(self))
@@ -92,24 +245,72 @@ class FramableMeta(type):
                 except TypeError as e:
                     raise  # missing required position arguments -> TODO : encapsulate in lib exception
 
+        if issubclass(cls, FramableRow):
+            # only the values are stored, and a view of them is returned
+            return cls._view(*cls._classbuffer.append(cls._tuple(*args, **kwargs)))
+
         inst = super(FramableMeta, cls).__call__(*args, **kwargs)
 
-        # get instance and store it in classframe
-        if isinstance(inst, dict):
-            cls._classframe = cls._classframe.append([inst],)
-        elif isinstance(inst, tuple) and hasattr(inst, "_asdict"):
-            cls._classframe = cls._classframe.append([inst._asdict()],)
-        else:
-            cls._classframe = cls._classframe.append([vars(inst)],)
-        # column and dtypes will be inferred...
-        cls._classframe.convert_dtypes()
+        # store instance (a tuple, with values ordered as fields) in classbuffer, unless recording is disabled
+        if framableswitch.enabled:
+            cls._classbuffer.append(inst)
 
         return inst
 
+    def from_columns(cls, columns):
+        """ Creating instances in bulk, from a mapping of field names to sequences of values.
+        Missing fields get their default value. All rows are added to the class frame at once,
+        and a FramableBatch is returned, building instances only when they are accessed.
+        """
+        unknown = [f for f in columns if f not in cls._fields]
+        if unknown:
+            raise TypeError(f"{cls.__name__} got unexpected fields {unknown}")
+        lengths = {len(c) for c in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"All columns must have the same length, not {sorted(lengths)}")
+        n = lengths.pop() if lengths else 0
+
+        values = []
+        for f in cls._fields:
+            if f in columns:
+                values.append(columns[f])
+            else:  # checked once for the whole column
+                values.append(_filled(cls, f, [_MISSING] * n))
+
+        if issubclass(cls, FramableRow):  # always stored, the instances are views of the class frame
+            segment, pos = cls._classbuffer.extend(values)
+            return FramableRowBatch(cls, segment, range(pos, pos + n))
+        if framableswitch.enabled:
+            cls._classbuffer.extend(values)
+        return FramableBatch(cls, values)
+
+    def from_records(cls, records):
+        """ Creating instances in bulk, from an iterable of records.
+        Records are either sequences of values, in the order of fields (like rows from csv.reader),
+        or mappings of field names to values (like rows from csv.DictReader).
+        """
+        records = list(records)
+        if records and isinstance(records[0], collections.abc.Mapping):
+            names = dict.fromkeys(itertools.chain.from_iterable(records))
+            columns = {f: [r.get(f, _MISSING) for r in records] for f in names}
+        else:
+            widths = {len(r) for r in records}
+            if max(widths, default=0) > len(cls._fields):
+                raise TypeError(f"{cls.__name__} takes {len(cls._fields)} fields, but a record has {max(widths)}")
+            if min(widths, default=0) == len(cls._fields):
+                return cls.from_columns(
+                    {f: list(map(operator.itemgetter(i), records)) for i, f in enumerate(cls._fields)}
+                )
+            # short records get default values, like a namedtuple
+            columns = dict(zip(cls._fields, itertools.zip_longest(*records, fillvalue=_MISSING)))
+        return cls.from_columns({f: _filled(cls, f, column) for f, column in columns.items()})
+
     @property
     def __frame__(cls):
-        """ Accessing classframe via property to prevent mutation """
-        return cls._classframe
+        """ Accessing classframe via property to prevent mutation.
+        column and dtypes will be inferred when building the frame, and it is memoized until new instances arrive.
+        """
+        return cls._classbuffer.frame
 
     # TODO : add for sum of types (and concatenation of namedtuple implementation)
 
@@ -138,3 +339,29 @@ if __name__ == "__main__":
     print(MyKls.__frame__)
 
     print(myobj2.__series__)
+
+    class MyRecentKls(metaclass=FramableMeta, maxlen=2):
+        att1: int = 0
+
+    for a in range(5):
+        MyRecentKls(att1=a)
+
+    print(MyRecentKls.__frame__)  # only the last 2 instances
+
+    batch = MyKls.from_records([(1, 2), (3,)])
+    print(batch[1])  # built when accessed
+    print(MyKls.from_columns({"att1": range(3)}))
+
+    print(MyKls.__frame__)
+
+    class MyCompactKls(metaclass=FramableMeta, compact=True):
+        att1: int = 0
+
+    mycompactobj = MyCompactKls(att1=42)  # no __dict__, as small as a namedtuple
+    print(mycompactobj.att1)
+
+    class MyFlyweightKls(metaclass=FramableMeta, flyweight=True):
+        att1: int = 0
+
+    myflyweightobj = MyFlyweightKls(att1=42)  # a view of its row in the class frame
+    print(myflyweightobj, MyFlyweightKls.__frame__)
@@ -0,0 +1,88 @@
+"""
+Sampling policies, deciding which calls get recorded in a trace.
+
+A sampler is called once per call, and returns the weight of the call if it is to be recorded,
+ie. the number of calls this record stands for, or 0 if the call is to be skipped.
+Summing the weights of recorded calls estimates the total number of calls.
+"""
+import itertools
+import random
+import threading
+import time
+
+
+class FramableSampler:
+    """ Base sampler, recording every call. """
+
+    def __call__(self):
+        return 1
+
+
+class EverySampler(FramableSampler):
+    """ Recording every k-th call, starting with the first one """
+
+    def __init__(self, k: int):
+        if k < 1:
+            raise ValueError(f"k must be a positive integer, not {k}")
+        self.k = k
+        self._count = itertools.count()  # next() is atomic, so concurrent calls are counted once each
+
+    def __call__(self):
+        return self.k if next(self._count) % self.k == 0 else 0
+
+
+class RateSampler(FramableSampler):
+    """ Recording each call with probability rate """
+
+    def __init__(self, rate: float, seed=None):
+        if not 0 < rate <= 1:
+            raise ValueError(f"rate must be in ]0, 1], not {rate}")
+        self.rate = rate
+        self._weight = 1 / rate
+        self._random = random.Random(seed).random
+
+    def __call__(self):
+        return self._weight if self._random() < self.rate else 0
+
+
+class TokenBucketSampler(FramableSampler):
+    """ Recording at most per_second calls per second, allowing bursts of up to burst calls.
+
+    The weight of a recorded call is the number of calls since the previous recorded one.
+    The bucket is updated under a lock, so concurrent calls dont exceed the rate, nor lose skipped calls.
+    """
+
+    def __init__(self, per_second: float, burst: int = None, clock=time.monotonic):
+        if per_second <= 0:
+            raise ValueError(f"per_second must be positive, not {per_second}")
+        self.per_second = per_second
+        self.burst = max(1, int(per_second)) if burst is None else burst
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._last = clock()
+        self._skipped = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.per_second)
+            self._last = now
+            if self._tokens < 1:
+                self._skipped += 1
+                return 0
+            self._tokens -= 1
+            weight, self._skipped = self._skipped + 1, 0
+            return weight
+
+
+if __name__ == "__main__":
+
+    every = EverySampler(3)
+    print([every() for _ in range(7)])
+
+    rate = RateSampler(0.5, seed=42)
+    print([rate() for _ in range(7)])
+
+    bucket = TokenBucketSampler(per_second=2)
+    print([bucket() for _ in range(7)])
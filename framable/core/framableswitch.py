@@ -0,0 +1,36 @@
+"""
+Process-wide switch of recording, for framed functions and framable classes.
+
+Recording starts disabled if the FRAMABLE_DISABLED environment variable is set (to anything but 0 or false).
+While disabled, framed functions call the wrapped function directly, and framable classes dont record instances.
+The switch is a module global, so checking it on each call costs a single lookup.
+"""
+import os
+
+ENVIRONMENT_VARIABLE = "FRAMABLE_DISABLED"
+
+enabled = os.environ.get(ENVIRONMENT_VARIABLE, "").strip().lower() in ("", "0", "false", "no", "off")
+
+
+def enable():
+    """ Recording calls and instances, in the whole process """
+    global enabled
+    enabled = True
+
+
+def disable():
+    """ Not recording calls nor instances, in the whole process, until enable() is called """
+    global enabled
+    enabled = False
+
+
+def is_enabled() -> bool:
+    return enabled
+
+
+if __name__ == "__main__":
+
+    disable()
+    assert not is_enabled()
+    enable()
+    assert is_enabled()
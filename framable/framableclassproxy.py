@@ -1,5 +1,6 @@
 import wrapt
-import pandas as pd
+
+from framable.core.framablebuffer import framable_buffer
 
 
 class FramableClassProxy(wrapt.ObjectProxy):
@@ -7,30 +8,33 @@ class FramableClassProxy(wrapt.ObjectProxy):
     This provide the same functionality as FramableMeta, however using a proxy pattern (instead of a metaclass).
 
     The main advantage being that we can build a proxy around a class defined elsewhere.
+
+    If maxlen is specified, only the last maxlen instances are kept in the frame.
     """
 
-    def __new__(cls, wrapped):
+    def __new__(cls, wrapped, maxlen=None):
         wrapper = super(FramableClassProxy, cls).__new__(cls, wrapped)
         return wrapper
 
-    def __init__(self, wrapped):
+    def __init__(self, wrapped, maxlen=None):
         super(FramableClassProxy, self).__init__(wrapped)
-        self._classframe = pd.DataFrame()  # empty dataframe on class initialization
+        # empty buffer on class initialization. columns are discovered from instances attributes.
+        self._self_classbuffer = framable_buffer(maxlen=maxlen)
 
     def __call__(self, *args, **kwargs):
         inst = self.__wrapped__(*args, **kwargs)
 
-        # get instance and store it in classframe
-        self._classframe = self._classframe.append([vars(inst)], )
-        # column and dtypes will be inferred...
-        self._classframe.convert_dtypes()
+        # get instance attributes and store them in classbuffer
+        self._self_classbuffer.append(vars(inst))
 
         return inst
 
     @property
     def __frame__(self):
-        """ Accessing classframe via property to prevent mutation """
-        return self._classframe
+        """ Accessing classframe via property to prevent mutation.
+        column and dtypes will be inferred when building the frame, and it is memoized until new instances arrive.
+        """
+        return self._self_classbuffer.frame
 
 
 if __name__ == '__main__':
@@ -0,0 +1,206 @@
+"""
+Collecting calls of framed functions made in worker processes, into the frames of the parent process.
+
+Each worker ships the new records of the collected functions in batches, through a multiprocessing queue,
+every interval seconds and when it exits. The parent receives them in a thread, and merges them when a frame is read.
+"""
+import collections
+import functools
+import multiprocessing
+import multiprocessing.util
+import operator
+import os
+import pickle
+import threading
+
+from framable.framablefunctionwrapper import FramableBoundFunctionWrapper
+
+_SHIPPERS = []  # shippers running in this (worker) process, one per collector
+
+
+def _picklable(value):
+    try:
+        pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return value
+    except Exception:
+        return repr(value)
+
+
+def _dumps(items):
+    """ Pickling (seq, thread, record) items. Values that cannot be pickled are sent as their repr. """
+    try:
+        return pickle.dumps(items, pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return pickle.dumps(
+            [(seq, thread, tuple(map(_picklable, record))) for seq, thread, record in items], pickle.HIGHEST_PROTOCOL
+        )
+
+
+class _Shipper:
+    """ Sending new records of the functions, from a worker process to the collector queue """
+
+    def __init__(self, queue, functions, batch, interval):
+        self._queue = queue
+        self._functions = functions
+        self._batch = batch
+        self._cursors = {}  # (function position, segment) -> number of its records already shipped
+        # records already in forked buffers are calls of the parent, they are not shipped back
+        for i, function in enumerate(functions):
+            for segment in list(function._self_trace._segments):
+                self._cursors[i, segment] = segment.count
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        threading.Thread(target=self._run, args=(interval,), name="framable-shipper", daemon=True).start()
+        # run when the worker exits, before the queue is closed (exitpriority 10)
+        multiprocessing.util.Finalize(None, self.close, exitpriority=100)
+
+    def _run(self, interval):
+        while not self._stopped.wait(interval):
+            self.flush()
+
+    def flush(self):
+        """ Sending the records appended since the last flush, in batches """
+        pid = os.getpid()
+        with self._lock:
+            for i, function in enumerate(self._functions):
+                items = []
+                for segment in list(function._self_trace._segments):
+                    start, count = self._cursors.get((i, segment), 0), segment.count
+                    for pos in range(max(start, count - len(segment)), count):
+                        item = segment.get(pos)
+                        if item is not None:  # not overwritten since
+                            items.append((item[0], item[1], tuple(item[2])))
+                    self._cursors[i, segment] = count
+                items.sort(key=operator.itemgetter(0))
+                for b in range(0, len(items), self._batch):
+                    self._queue.put((pid, i, _dumps(items[b:b + self._batch])))
+
+    def close(self):
+        self._stopped.set()
+        self.flush()
+
+
+def _start_worker(queue, functions, batch, interval):
+    """ Initializer of worker processes, shipping their records to the collector queue """
+    _SHIPPERS.append(_Shipper(queue, functions, batch, interval))
+
+
+class _Collected:
+    """ Records of a framed function, received from worker processes, merged with its frame when it is read.
+    Like the trace, they are bounded to the last maxlen records, if maxlen is specified.
+    """
+
+    def __init__(self, maxlen=None):
+        self._lock = threading.Lock()
+        self._items = collections.deque(maxlen=maxlen)  # (seq, thread, pid, record), in order of reception
+        self._received = 0  # number of records ever received
+        self._memo = (None, -1, None)  # (local frame, number of received records, merged frame)
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, pid, items):
+        with self._lock:
+            self._items.extend((seq, thread, pid, record) for seq, thread, record in items)
+            self._received += len(items)
+
+    def frame(self, trace):
+        """ The frame of the trace buffer, followed by the received records, with a pid column.
+        Each record keeps its sequence number in its process as index.
+        """
+        import pandas as pd  # already imported, to build the local frame
+
+        local = trace.frame
+        memolocal, memoreceived, merged = self._memo
+        if memolocal is local and memoreceived == self._received:
+            return merged
+        with self._lock:
+            received, items = self._received, list(self._items)
+        merged = local.assign(pid=os.getpid())
+        if items:
+            seqs, threads, pids, records = (list(c) for c in zip(*items))
+            frame = trace._dataframe(seqs, threads, trace._columns(records))
+            frame["pid"] = pids
+            merged = pd.concat([merged, frame])
+            for field in trace._categorical:  # categories differ between processes
+                merged[field] = merged[field].astype("category")
+        self._memo = (local, received, merged)
+        return merged
+
+
+class FramableCollector:
+    """ Collecting calls of framed functions made in worker processes, into their frames in this process.
+
+    The worker processes must be started with the initializer of the collector, for instance with
+    ProcessPoolExecutor(initializer=collector.initializer) or multiprocessing.Pool(initializer=collector.initializer).
+    Workers send their new records every interval seconds, in batches of at most batch records,
+    and the remaining ones when they exit normally (a terminated worker loses its last records).
+    Collected frames have a pid column, with the process id of the worker, or of this process.
+    For traces bounded with maxlen, only the last maxlen records received are kept, besides the last maxlen local ones.
+    Call ids of call trees are unique per process only.
+
+    close() waits for the records of the workers that exited, and stops receiving.
+    Use the collector as a context manager around the pool, to close it once all workers exited.
+    """
+
+    def __init__(self, *functions, batch=1000, interval=1.0, context=None):
+        if batch < 1:
+            raise ValueError(f"batch must be a positive integer, not {batch}")
+        # bound methods are collected in the function of their class
+        self._functions = tuple(f._self_parent if isinstance(f, FramableBoundFunctionWrapper) else f for f in functions)
+        for function in self._functions:
+            if function._self_collected is None:
+                function._self_collected = _Collected(getattr(function._self_trace, "maxlen", None))
+        self._batch = batch
+        self._interval = interval
+        self._queue = (context or multiprocessing).Queue()
+        self._receiver = threading.Thread(target=self._receive, name="framable-collector", daemon=True)
+        self._receiver.start()
+
+    @property
+    def initializer(self):
+        """ The initializer of worker processes. It can also be called at the start of a custom initializer. """
+        return functools.partial(_start_worker, self._queue, self._functions, self._batch, self._interval)
+
+    def _receive(self):
+        while True:
+            message = self._queue.get()
+            if message is None:
+                return
+            pid, i, payload = message
+            self._functions[i]._self_collected.add(pid, pickle.loads(payload))
+
+    def close(self):
+        """ Receiving records already sent, then stopping. Workers still running should not send more. """
+        if self._receiver.is_alive():
+            self._queue.put(None)  # after records of exited workers, in the queue
+            self._receiver.join()
+            self._queue.close()
+            self._queue.join_thread()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+if __name__ == "__main__":
+    import concurrent.futures
+
+    from framable.framablefunctionwrapper import framed
+
+    @framed()
+    def square(a: int) -> int:
+        return a * a
+
+    square(-1)  # called in this process too
+
+    # workers are forked, so they find square in __main__
+    with FramableCollector(square) as collector:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=2, mp_context=multiprocessing.get_context("fork"), initializer=collector.initializer
+        ) as executor:
+            print(list(executor.map(square, range(8))))
+
+    print(square.__frame__)
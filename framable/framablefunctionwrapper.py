@@ -1,14 +1,100 @@
 from __future__ import annotations
 
 import ast
+import collections
+import contextvars
 import functools
+import importlib
 import inspect
+import itertools
+import os
+import pickle
+import sys
+import time
+import traceback
+import tracemalloc
+import weakref
 
 import typing
 import wrapt
-import pandas as pd
 
 from framable import FramableMeta
+from framable.core import framableswitch
+from framable.core.framablebuffer import SPILL_AFTER, annotation_typecodes, framable_buffer
+from framable.core.framablecache import FramableCache
+from framable.core.framableindex import FramableIndex
+from framable.core.framablesampler import FramableSampler
+
+
+def argbinder_factory(signature: inspect.Signature, defaults: typing.Dict[str, typing.Any]):
+    """ Compiling, once per signature, a function mapping (*args, **kwargs) to the argtuple fields.
+    It has the same parameter layout as the signature, so python does the binding, without inspect.Signature.bind.
+    Parameters with a default in the signature get their argtuple default.
+
+    Returns a factory, to specialize the binder for a (possibly refined) argtuple.
+    Note the argtuple instances are built with _make, they are not recorded in the argtuple class frame.
+    """
+    params = signature.parameters
+    if sys.version_info < (3, 8) and any(p.kind is inspect.Parameter.POSITIONAL_ONLY for p in params.values()):
+        # positional only parameters cannot be declared in python source before 3.8
+        return functools.partial(_argbinder_bind, signature, defaults=defaults)
+
+    argtuple = "argtuple"
+    while argtuple in params:  # avoiding shadowing argtuple with a parameter
+        argtuple = "_" + argtuple
+
+    layout = []
+    kind = None
+    for name, p in params.items():
+        if kind is inspect.Parameter.POSITIONAL_ONLY and p.kind is not inspect.Parameter.POSITIONAL_ONLY:
+            layout.append("/")
+        if p.kind is inspect.Parameter.KEYWORD_ONLY and kind not in (
+            inspect.Parameter.VAR_POSITIONAL,
+            inspect.Parameter.KEYWORD_ONLY,
+        ):
+            layout.append("*")
+
+        if p.kind is inspect.Parameter.VAR_POSITIONAL:
+            layout.append(f"*{name}")
+        elif p.kind is inspect.Parameter.VAR_KEYWORD:
+            layout.append(f"**{name}")
+        elif p.default is inspect._empty:
+            layout.append(name)
+        else:
+            layout.append(f"{name}=defaults[{name!r}]")
+        kind = p.kind
+    if kind is inspect.Parameter.POSITIONAL_ONLY:
+        layout.append("/")
+
+    source = (
+        f"def factory({argtuple}, defaults):\n"
+        f"    def argbinder({', '.join(layout)}):\n"
+        f"        return {argtuple}._make(({''.join(p + ', ' for p in params)}))\n"
+        f"    return argbinder\n"
+    )
+    namespace = {}
+    exec(source, {}, namespace)
+    return functools.partial(namespace["factory"], defaults=defaults)
+
+
+def _argbinder_bind(signature: inspect.Signature, argtuple, defaults: typing.Dict[str, typing.Any]):
+    """ Slower argbinder, binding with inspect.Signature.bind, for signatures that cannot be compiled """
+
+    def argbinder(*args, **kwargs):
+        arguments = signature.bind(*args, **kwargs).arguments
+        values = []
+        for name, p in signature.parameters.items():
+            if name in arguments:
+                values.append(arguments[name])
+            elif p.kind is inspect.Parameter.VAR_POSITIONAL:
+                values.append(())
+            elif p.kind is inspect.Parameter.VAR_KEYWORD:
+                values.append({})
+            else:
+                values.append(defaults[name])
+        return argtuple._make(values)
+
+    return argbinder
 
 
 def signature_tuple(wrapped: typing.Callable):
@@ -30,15 +116,33 @@ def signature_tuple(wrapped: typing.Callable):
         else:
             with_defaults[p] = None  # default value for any type in python...
 
-    argtuple = FramableMeta(
-        f"{wrapped.__name__}_arguments_tuple",
-        bases=(),
-        ns={
-            # **signature.parameters,  # not needed ??
-            **with_defaults,
-            "__annotations__": with_hints,
-        },
-    )
+    def make_argtuple(hints):
+        return FramableMeta(
+            f"{wrapped.__name__}_arguments_tuple",
+            bases=(),
+            ns={
+                # **signature.parameters,  # not needed ??
+                **with_defaults,
+                "__annotations__": hints,
+            },
+            compact=True,  # built with _make, fields must be read from the tuple
+        )
+
+    def make_result_tuple(default, hint):
+        return FramableMeta(
+            f"{wrapped.__name__}_result_tuple",
+            bases=(),
+            ns={
+                "result": default,  # default return value in python
+                "__annotations__": {"result": hint}
+                # note 'return' is a special key : https://docs.python.org/3/library/inspect.html#types-and-members
+                # BUT nametuple keys cannot be keywords...
+            },
+            compact=True,
+        )
+
+    argtuple = make_argtuple(with_hints)
+    make_argbinder = argbinder_factory(signature, with_defaults)
 
     # TODO : maybe default to id() to return initial object seems sensible ??
     if signature.return_annotation is inspect._empty:
@@ -50,47 +154,116 @@ def signature_tuple(wrapped: typing.Callable):
             result_hint.__initial__ if hasattr(result_hint, "__initial__") else None
         )
 
-    result_tuple = FramableMeta(
-        f"{wrapped.__name__}_result_tuple",
-        bases=(),
-        ns={
-            "result": result_default,  # default return value in python
-            "__annotations__": {"result": result_hint}
-            # note 'return' is a special key : https://docs.python.org/3/library/inspect.html#types-and-members
-            # BUT nametuple keys cannot be keywords...
-        },
-    )
+    result_tuple = make_result_tuple(result_default, result_hint)
+
+    # refined tuples are memoized per instance type (not per instance), and evicted with the type.
+    # Note the refined tuples must not hold a strong reference to the type, or it would never be evicted.
+    refined = weakref.WeakKeyDictionary()
 
     def bind(instance):
         """ refining signature of the method after binding for proper typing."""
-        nonlocal argtuple, result_default, result_hint
-
-        # specializing first bound argument type annotation
-        argtuple.__annotations__[next(iter(signature.parameters))] = type(instance)
+        instance_type = type(instance)
+        try:
+            return refined[instance_type]
+        except KeyError:
+            pass
+
+        # specializing first bound argument type annotation (as a forward reference)
+        bound_hints = dict(with_hints)
+        bound_hints[next(iter(signature.parameters))] = instance_type.__qualname__
         # note default doesn't change
         # we need one for framable semantics, and we want stuff to break if somehow python doesnt pass self...
 
         # make bound methods return self-type instances by default, if not specified otherwise in type hints
+        # Note the result default cannot be the instance anymore, since the refinement is shared by the type.
         if signature.return_annotation is inspect._empty:
-            result_hint = type(instance)  # default return type in python
-
-        # make result default to instance value (providing chainable call interface by default)
-        if isinstance(instance, result_hint):
-            result_default = instance
-
-        # refine the result tuple
-        result_tuple = FramableMeta(
-            f"{wrapped.__name__}_result_tuple",
-            bases=(),
-            ns={"result": result_default, "__annotations__": {"result": result_hint}},
-        )
+            bound_result_hint = instance_type.__qualname__
+        else:
+            bound_result_hint = result_hint
         # otherwise keep it the same (same semantics as unbound)
 
         # signature for python doesnt change (?)
 
-        return signature, argtuple, result_tuple
-
-    return signature, argtuple, result_tuple, bind
+        bound_argtuple = make_argtuple(bound_hints)
+        refined[instance_type] = (
+            signature,
+            bound_argtuple,
+            make_argbinder(bound_argtuple),
+            make_result_tuple(None, bound_result_hint),
+        )
+        return refined[instance_type]
+
+    return signature, argtuple, make_argbinder(argtuple), result_tuple, bind
+
+
+# the traced call running in the current context, as (callid, parent callid, depth), for call trees.
+# Each thread, and each asyncio task, has its own context, tasks starting with the one they were created in.
+_CALL = contextvars.ContextVar("framable_call", default=None)
+_CALLIDS = itertools.count()  # call ids are unique in the process, so trees span traced functions
+_TREES = weakref.WeakSet()  # traced functions recording their call tree
+
+
+def _enter_call():
+    """ Entering a traced call, returning its (callid, parent callid, depth), and the token to exit it """
+    parent = _CALL.get()
+    node = (next(_CALLIDS), None, 0) if parent is None else (next(_CALLIDS), parent[0], parent[2] + 1)
+    return node, _CALL.set(node)
+
+
+def _runner(timing=False, cputime=False, memory=False, exceptions=False, calltree=False):
+    """ Building a function calling call(*args, **kwargs), and returning (result, columns, exception).
+    columns are measures of the call : start (ns since epoch) and duration (ns) if timing, then the cpu time of the
+    calling thread (ns) and the allocated bytes, if they are measured.
+    If exceptions are captured, an exception raised by the call is returned instead, so the call can be recorded
+    before the exception is raised again. columns are then followed by its type and message, None if the call returned,
+    and its formatted traceback if exceptions is "traceback".
+    If calltree, columns end with the call id, the call id of the traced call it is made from, and its depth.
+    Options are bound in the function, to keep the call path short.
+    """
+    time_ns, perf_counter_ns = time.time_ns, time.perf_counter_ns
+    thread_time_ns, traced_memory = time.thread_time_ns, tracemalloc.get_traced_memory
+    tracebacks = exceptions == "traceback"
+
+    def run(call, args, kwargs):
+        if calltree:
+            node, token = _enter_call()
+        if memory:
+            allocated = traced_memory()[0]
+        if cputime:
+            cpu = thread_time_ns()
+        if timing:
+            start, counter = time_ns(), perf_counter_ns()
+        try:
+            result, exception = call(*args, **kwargs), None
+        except Exception as exc:  # not BaseException, interruptions and exits are not failed calls
+            if not exceptions:
+                raise
+            result, exception = None, exc
+        finally:
+            if calltree:
+                _CALL.reset(token)
+        columns = (start, perf_counter_ns() - counter) if timing else ()
+        if cputime:
+            columns += (thread_time_ns() - cpu,)
+        if memory:
+            columns += (traced_memory()[0] - allocated,)
+        if exceptions:
+            columns += _failure(exception, tracebacks)
+        if calltree:
+            columns += node
+        return result, columns, exception
+
+    return run
+
+
+def _failure(exception, tracebacks=False):
+    """ Returning the columns recording an exception : its type and message, and its formatted traceback if asked """
+    if exception is None:
+        return (None, None, None) if tracebacks else (None, None)
+    failure = (type(exception), str(exception))
+    if tracebacks:
+        failure += ("".join(traceback.format_exception(type(exception), exception, exception.__traceback__)),)
+    return failure
 
 
 class FramableBoundFunctionWrapper(wrapt.BoundFunctionWrapper):
@@ -116,78 +289,164 @@ class FramableBoundFunctionWrapper(wrapt.BoundFunctionWrapper):
 
         self._self_descriptor = descriptor
 
-        self._self_signature = self._self_parent._self_signature
-        self._self_argtuple = self._self_parent._self_argtuple
-        self._self_resulttuple = self._self_parent._self_resulttuple
-
-        # using the properly initialized frames, storing the instance in columns somehow...
-        self._self_callframe = self._self_parent._self_callframe
-        self._self_returnframe = self._self_parent._self_returnframe
         # Note this is called again whenever needed and bounded object is reconstructed
+        # The trace buffers are stored (and only accessed) in the parent.
 
         if self._self_instance:
             # This happens on bound functions only
             # It is the only case were we need partial binding of the signature
             # static method doesnt and classmethod "hides" the class argument from the signature
-            sig, argt, rest = _self_parent._self_sigbind(self._self_instance)
-            self._self_signature = sig
-            self._self_argtuple = argt
-            self._self_resulttuple = rest
+            # Note : the refinement is memoized per instance type in the parent, this is only a lookup.
+            (
+                self._self_signature,
+                self._self_argtuple,
+                self._self_argbinder,
+                self._self_resulttuple,
+            ) = _self_parent._self_sigbind(self._self_instance)
+        else:
+            self._self_signature = _self_parent._self_signature
+            self._self_argtuple = _self_parent._self_argtuple
+            self._self_argbinder = _self_parent._self_argbinder
+            self._self_resulttuple = _self_parent._self_resulttuple
 
     def __call__(self, *args, **kwargs):
 
+        # if disabled, for the process or this function, calling the bound function directly, as wrapt would
+        if not framableswitch.enabled:
+            return self.__wrapped__(*args, **kwargs)
+        parent = self._self_parent
+        enabled, cache, sampler, inline = parent._self_gate
+        if enabled is not None and not (enabled() if callable(enabled) else enabled):
+            return self.__wrapped__(*args, **kwargs)
+
+        if cache is not None:
+            argt = (
+                self._self_argbinder(self._self_instance, *args, **kwargs) if self._self_instance
+                else self._self_argbinder(*args, **kwargs)
+            )
+            return parent._self_call_pure(
+                super(FramableBoundFunctionWrapper, self).__call__, args, kwargs, argt, self._self_resulttuple,
+                self._self_binding == "function" and bool(argt),
+            )
+
+        # sampling first, calls that are not sampled call the wrapped function directly, like disabled ones
+        meta = ()
+        if sampler is not None:
+            weight = sampler()
+            if not weight:
+                return self.__wrapped__(*args, **kwargs)
+            meta = (weight,)
+
+        # building argtuple instance, before the call, as binding would (raising TypeError on mismatch)
+        # Note : instance of the method call must be in argtuple !
         if self._self_instance:
             # we bind only if we have an instance retrieved by wrapt (bound function case)
-            bound_args = self._self_signature.bind(self._self_instance, *args, **kwargs)
+            argt = self._self_argbinder(self._self_instance, *args, **kwargs)
         else:
-            bound_args = self._self_signature.bind(*args, **kwargs)
+            argt = self._self_argbinder(*args, **kwargs)
+
+        # first argument is the instance, to be indexed for per-instance frames
+        indexed = self._self_binding == "function" and bool(argt)
+
+        if inline:  # the result is recorded with its start and duration
+            start, counter = time.time_ns(), time.perf_counter_ns()
+            result = self.__wrapped__(*args, **kwargs)
+            parent._self_record(argt, (result, start, time.perf_counter_ns() - counter), meta, indexed)
+            return result
+        if inline is not None:
+            result = self.__wrapped__(*args, **kwargs)
+            parent._self_record(argt, (result,), meta, indexed)
+            return result
+
+        if parent._self_async:
+            start = time.time_ns()
+            # where is instance grabbed from ? cant we retrieve it before calling ?
+            coro = super(FramableBoundFunctionWrapper, self).__call__(*args, **kwargs)
+            return parent._self_record_async(coro, argt, self._self_resulttuple, start, meta, indexed)
+
+        if parent._self_generator:
+            gen = super(FramableBoundFunctionWrapper, self).__call__(*args, **kwargs)
+            return parent._self_record_generator(gen, argt, self._self_resulttuple, meta, indexed)
 
         # where is instance grabbed from ? cant we retrieve it before calling ?
-        result = super(FramableBoundFunctionWrapper, self).__call__(*args, **kwargs)
+        runner = parent._self_runner
+        if runner is None:
+            result, exception = super(FramableBoundFunctionWrapper, self).__call__(*args, **kwargs), None
+        else:
+            result, columns, exception = runner(super(FramableBoundFunctionWrapper, self).__call__, args, kwargs)
+            meta = columns + meta
 
         # note: Here instance can be the class (for class methods) or None (for static methods)
 
-        # building argtuple instance
-        # Note : instance of the method call must be in argtuple !
-        args = self._self_argtuple(**bound_args.arguments)
+        # converting result... (not recorded in the result tuple class frame, the trace is the record)
+        restuple = self._self_resulttuple._make((result,))
 
-        # converting result...
-        restuple = self._self_resulttuple(result)
-
-        # bound function gets recreated everytime we want to access it. we need to store the callframe in the parent.
-        self._self_parent._self_callframe = self._self_parent._self_callframe.append(
-            [args._asdict()], ignore_index=True
-        )
-        self._self_parent._self_returnframe = self._self_parent._self_returnframe.append(
-            [restuple._asdict()], ignore_index=True
-        )
+        # bound function gets recreated everytime we want to access it. we need to store the trace in the parent.
+        parent._self_record(argt, restuple, meta, indexed)
 
+        if exception is not None:  # captured, and recorded
+            raise exception
         return result
 
+    @property
+    def _self_callframe(self):
+        return self._self_parent._self_callframe
+
+    @property
+    def _self_returnframe(self):
+        return self._self_parent._self_returnframe
+
     @property
     def __frame__(self):
         """ Accessing _self_callframe via property to prevent mutation """
         if self._self_instance:  # bound usecase (also in frame)
             firstparam = next(iter(self._self_signature.parameters))
-            # taking only subframe for current instance
-            boundframe = self._self_callframe.loc[
-                self._self_callframe[firstparam] == self._self_instance
-            ].drop([firstparam], axis=1)
+            # taking only records for current instance, via the parent index, without the instance column
+            handles = self._self_parent._self_instances.get(id(self._self_instance), ())
+            return self._self_parent._self_trace.take(handles).iloc[:, 1:]
         else:
             # if called on the class (and not the instance)
-            boundframe = self._self_callframe
-        return boundframe.join(self._self_returnframe)
+            return self._self_parent.__frame__
+
+    @property
+    def __cache__(self):
+        return self._self_parent._self_cache
+
+    @property
+    def __trace__(self):
+        if self._self_instance and self._self_binding == "function":  # looking up calls of this instance only
+            return self._self_parent._self_index.prefixed((self._self_instance,))
+        return self._self_parent._self_index
+
+    def __reduce_ex__(self, protocol):
+        if self._self_instance is not None:  # pickled as the method of its (pickled) instance
+            return getattr, (self._self_instance, self.__name__)
+        return self._self_parent.__reduce_ex__(protocol)
+
+    @property
+    def __enabled__(self):
+        return self._self_parent.__enabled__
+
+    @__enabled__.setter
+    def __enabled__(self, enabled):
+        self._self_parent.__enabled__ = enabled
 
 
 class FramableFunctionWrapper(wrapt.FunctionWrapper):
 
     __bound_function_wrapper__ = FramableBoundFunctionWrapper
 
-    def __init__(self, wrapped, wrapper):
+    def __init__(
+        self, wrapped, wrapper, maxlen=None, sample=None, spill=None, spill_after=SPILL_AFTER, pure=None,
+        timing=False, cputime=False, memory=False, exceptions=False, calltree=False, enabled=None,
+    ):
+        # enabled is not given to wrapt, where it is read-only, so it can be switched at runtime
         super(FramableFunctionWrapper, self).__init__(wrapped, wrapper)
-        sig, argt, rest, bind = signature_tuple(wrapped)
+        self._self_switch = enabled
+        sig, argt, argb, rest, bind = signature_tuple(wrapped)
         self._self_signature = sig
         self._self_argtuple = argt
+        self._self_argbinder = argb
         self._self_resulttuple = rest
         self._self_sigbind = bind
 
@@ -196,54 +455,377 @@ class FramableFunctionWrapper(wrapt.FunctionWrapper):
         )
         # that it is time to reset its data, that might be stored elsewhere...
 
-        self._self_callframe = pd.DataFrame(
-            columns=argt._fields
-        )  # empty dataframe before we have any data sample...
-        self._self_returnframe = pd.DataFrame(
-            columns=rest._fields
-        )  # empty dataframe before we have any data sample...
+        # one buffer for the trace, each record is arguments, then result, then call metadata.
+        # The dataframe is only built when needed, with a thread column, and the call sequence number as index.
+        # if maxlen is specified, only the last maxlen calls are kept.
+        # for async functions, the awaited result is recorded, with start and end timestamps (ns since epoch).
+        # for generator functions, each yielded item is recorded as a result, with the call id and its step.
+        # if a sampler is specified, the weight of each recorded call is kept along the result.
+        # if spill is specified, the trace is moved to files every spill_after calls, with typed columns when annotated.
+        # if pure is specified, results are cached by argtuple, and served without calling the function.
+        # if timing is specified, each call is recorded with its start and duration (ns).
+        # if cputime is specified, each call is recorded with the cpu time of its thread (ns), a system call.
+        # if memory is specified, each call is recorded with the bytes it allocated (and didnt free), via tracemalloc.
+        # if exceptions is specified, calls raising an exception are recorded too, with its type and message.
+        # if calltree is specified, each call is recorded with its id, the id of the traced call it is made from,
+        # and its depth, so traces of functions calling each other can be combined in a call tree (see calltree()).
+        self._self_async = inspect.iscoroutinefunction(wrapped)
+        self._self_generator = inspect.isgeneratorfunction(wrapped)
+        # Note : a cache is a container, it is false when empty
+        self._self_cache = pure if isinstance(pure, FramableCache) else (FramableCache() if pure else None)
+        if self._self_cache is not None and (self._self_async or self._self_generator):
+            raise TypeError(f"{wrapped.__name__} returns a coroutine or a generator, its results cannot be cached")
+        timing = timing or cputime or memory
+        if timing and (self._self_async or self._self_generator):
+            raise TypeError(f"{wrapped.__name__} returns a coroutine or a generator, its calls cannot be timed")
+        if exceptions and self._self_generator:
+            raise TypeError(f"{wrapped.__name__} returns a generator, its exceptions cannot be recorded")
+        if calltree and self._self_generator:
+            raise TypeError(f"{wrapped.__name__} returns a generator, its calls are not nested in the caller")
+        self._self_exceptions = exceptions
+        self._self_calltree = calltree
+        self._self_runner = (
+            _runner(timing, cputime, memory, exceptions, calltree)
+            if timing or ((exceptions or calltree) and not self._self_async) else None
+        )
+        if calltree:
+            _TREES.add(self)
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._self_callids = itertools.count()
+        self._self_sampler = sample
+        # read at once on each call, each attribute of a wrapper costs a lookup through wrapt.
+        # Calls of plain functions, only timed or not measured, are recorded inline in __call__, without the runner:
+        # inline is True if they are timed, False if not, and None for other calls.
+        inline = None
+        if not (cputime or memory or exceptions or calltree or self._self_async or self._self_generator):
+            inline = bool(timing)
+        self._self_gate = (enabled, self._self_cache, sample, inline)
+        self._self_trace = framable_buffer(
+            argt._fields
+            + rest._fields
+            + (("start", "end") if self._self_async else ())
+            + (("call", "step") if self._self_generator else ())
+            + (("start", "duration") if timing else ())
+            + (("cputime",) if cputime else ())
+            + (("allocated",) if memory else ())
+            + (("exception", "message") if exceptions else ())
+            + (("traceback",) if exceptions == "traceback" else ())
+            + (("callid", "parent", "depth") if calltree else ())
+            + (() if sample is None else ("weight",)),
+            maxlen=maxlen,
+            threads=True,
+            typecodes={
+                "start": "q", "end": "q", "call": "q", "step": "q", "duration": "q", "cputime": "q", "allocated": "q",
+                "callid": "q", "depth": "q",
+                # the result tuple hint is the type of the return annotation, the annotation itself gives the typecode
+                **annotation_typecodes({**argt.__annotations__, "result": sig.return_annotation}),
+            } if spill else None,
+            spill=spill,
+            spill_after=spill_after,
+            categorical=("exception",) if exceptions else (),
+        )
+        # index of call handles by instance id, for methods
+        self._self_instances = dict()
+        # index of call handles by argtuple, updated on lookup, for the mapping view of the trace
+        self._self_index = FramableIndex(self._self_trace, len(argt._fields), len(argt._fields), keytype=argt)
+        # records of calls in worker processes, received by a FramableCollector
+        self._self_collected = None
+
+    def _self_record_instance(self, instance, handle):
+        """ Indexing the call handle by instance, to build per-instance frames in O(k) """
+        key = id(instance)
+        handles = self._self_instances.get(key)
+        if handles is None:
+            new = collections.deque()
+            handles = self._self_instances.setdefault(key, new)  # atomic, in case of concurrent calls
+            if handles is new:
+                try:  # dropping the index entry when the instance is garbage collected
+                    weakref.finalize(instance, self._self_instances.pop, key, None)
+                except TypeError:
+                    pass  # instance cannot be weakly referenced
+        handles.append(handle)
+        # dropping handles of calls that are not in the (bounded) buffer anymore
+        first = handles[0]
+        while not first[0].valid(first[1]):
+            try:
+                handles.remove(first)
+            except ValueError:
+                pass  # already removed by a concurrent call
+            first = handles[0]
+
+    def _self_record(self, argt, restuple, meta, indexed=False):
+        """ Recording one call. Arguments, result and call metadata are appended at once,
+        so they cannot be misaligned by concurrent calls.
+        """
+        handle = self._self_trace.append(argt + restuple + meta)
+        if indexed:
+            self._self_record_instance(argt[0], handle)
+
+    async def _self_record_async(self, coro, argt, resulttuple, start, meta, indexed=False):
+        """ Awaiting the coroutine of an async function call, and recording the awaited result inline.
+        If exceptions are captured, a call raising is recorded too, before the exception is raised again.
+        If calltree, the call is the parent of traced calls made while it is awaited.
+        """
+        exceptions = self._self_exceptions
+        if self._self_calltree:  # the coroutine runs in the context of the awaiting task
+            node, token = _enter_call()
+            meta = node + meta
+        try:
+            result = await coro
+        except Exception as exc:
+            if not exceptions:
+                raise
+            failure = _failure(exc, exceptions == "traceback")
+            self._self_record(argt, resulttuple._make((None,)), (start, time.time_ns()) + failure + meta, indexed)
+            raise
+        finally:
+            if self._self_calltree:
+                _CALL.reset(token)
+        failure = _failure(None, exceptions == "traceback") if exceptions else ()
+        self._self_record(argt, resulttuple._make((result,)), (start, time.time_ns()) + failure + meta, indexed)
+        return result
+
+    def _self_record_generator(self, gen, argt, resulttuple, meta, indexed=False):
+        """ Iterating on the generator of a generator function call, and recording each item as it is pulled.
+        This is the expansion of 'yield from gen' (PEP 380), so send(), throw() and close() reach the generator.
+        """
+        call = next(self._self_callids)
+        step = 0
+        try:
+            item = next(gen)
+        except StopIteration as stop:
+            return stop.value
+        while True:
+            self._self_record(argt, resulttuple._make((item,)), (call, step) + meta, indexed)
+            step += 1
+            try:
+                sent = yield item
+            except GeneratorExit:
+                gen.close()
+                raise
+            except BaseException as exc:
+                try:
+                    item = gen.throw(exc)
+                except StopIteration as stop:
+                    return stop.value
+            else:
+                try:
+                    item = gen.send(sent)
+                except StopIteration as stop:
+                    return stop.value
+
+    def _self_call_pure(self, call, args, kwargs, argt, resulttuple, indexed=False):
+        """ Returning the cached result of a pure function call, or calling it, recording and caching its result.
+        Calls served from the cache are not recorded, the trace has only actual calls.
+        """
+        cache = self._self_cache
+        try:
+            return cache[argt]
+        except KeyError:
+            cacheable = True
+        except TypeError:  # unhashable arguments, the result cannot be cached
+            cacheable = False
+        runner = self._self_runner
+        if runner is None:
+            result, columns, exception = call(*args, **kwargs), (), None
+        else:
+            result, columns, exception = runner(call, args, kwargs)
+        sampler = self._self_sampler
+        meta = () if sampler is None else (sampler(),)
+        if not meta or meta[0]:
+            self._self_record(argt, resulttuple._make((result,)), columns + meta, indexed)
+        if exception is not None:  # captured, and recorded, but not cached
+            raise exception
+        if cacheable:
+            cache[argt] = result
+        return result
 
     def __call__(self, *args, **kwargs):
 
-        # here we bind on the signature
+        # if disabled, for the process or this function, calling the function directly, as wrapt would
+        if not framableswitch.enabled:
+            return self.__wrapped__(*args, **kwargs)
+        enabled, cache, sampler, inline = self._self_gate
+        if enabled is not None and not (enabled() if callable(enabled) else enabled):
+            return self.__wrapped__(*args, **kwargs)
+
+        if cache is not None:
+            return self._self_call_pure(
+                super(FramableFunctionWrapper, self).__call__, args, kwargs, self._self_argbinder(*args, **kwargs),
+                self._self_resulttuple,
+            )
+
+        # sampling first, calls that are not sampled call the wrapped function directly, like disabled ones
+        meta = ()
+        if sampler is not None:
+            weight = sampler()
+            if not weight:
+                return self.__wrapped__(*args, **kwargs)
+            meta = (weight,)
+
+        # here we bind on the signature, building argtuple instance
         # mandatory first arguments - self, class - are not part of the signature see PEP 362)
-        bound_args = self._self_signature.bind(*args, **kwargs)
-
-        result = super(FramableFunctionWrapper, self).__call__(*args, **kwargs)
-
-        # building argtuple instance
-        args = self._self_argtuple(**bound_args.arguments)
+        argt = self._self_argbinder(*args, **kwargs)
+
+        if inline:  # the result is recorded with its start and duration
+            start, counter = time.time_ns(), time.perf_counter_ns()
+            result = self.__wrapped__(*args, **kwargs)
+            self._self_record(argt, (result, start, time.perf_counter_ns() - counter), meta)
+            return result
+        if inline is not None:
+            result = self.__wrapped__(*args, **kwargs)
+            self._self_record(argt, (result,), meta)
+            return result
+
+        if self._self_async:
+            start = time.time_ns()
+            coro = super(FramableFunctionWrapper, self).__call__(*args, **kwargs)
+            return self._self_record_async(coro, argt, self._self_resulttuple, start, meta)
+
+        if self._self_generator:
+            gen = super(FramableFunctionWrapper, self).__call__(*args, **kwargs)
+            return self._self_record_generator(gen, argt, self._self_resulttuple, meta)
+
+        runner = self._self_runner
+        if runner is None:
+            result, exception = super(FramableFunctionWrapper, self).__call__(*args, **kwargs), None
+        else:
+            result, columns, exception = runner(super(FramableFunctionWrapper, self).__call__, args, kwargs)
+            meta = columns + meta
 
         # converting result... careful this needs to match how the signature interpreted result as tuple...
-        restuple = self._self_resulttuple(result)
+        # (not recorded in the result tuple class frame, the trace is the record)
+        restuple = self._self_resulttuple._make((result,))
 
         #  we don't need to apply default here, it has already been done during the call
-        self._self_callframe = self._self_callframe.append(
-            [args._asdict()], ignore_index=True
-        )
-        self._self_returnframe = self._self_returnframe.append(
-            [restuple._asdict()], ignore_index=True
-        )
+        self._self_record(argt, restuple, meta)
+
+        if exception is not None:  # captured, and recorded
+            raise exception
         return result
 
+    @property
+    def _self_callframe(self):
+        return self.__frame__.iloc[:, : len(self._self_argtuple._fields)]
+
+    @property
+    def _self_returnframe(self):
+        return self.__frame__.iloc[:, len(self._self_argtuple._fields):]
+
     @property
     def __frame__(self):
-        """ Accessing _self_callframe and _self_resultframe via property to prevent mutation """
-        return self._self_callframe.join(self._self_returnframe)
+        """ Accessing the trace frame via property to prevent mutation.
+        If calls in worker processes are collected, they follow the calls of this process, with a pid column.
+        """
+        collected = self._self_collected
+        if collected is not None:
+            return collected.frame(self._self_trace)
+        return self._self_trace.frame
+
+    def __reduce_ex__(self, protocol):
+        # pickled by reference, like a function, so it can be sent to worker processes
+        try:
+            found = _framed_function(self.__module__, self.__qualname__)
+        except (ImportError, KeyError, TypeError):
+            found = None
+        if found is not self:
+            raise pickle.PicklingError(f"Cannot pickle {self.__qualname__}, it is not {self.__module__}.{self.__qualname__}")
+        return _framed_function, (self.__module__, self.__qualname__)
 
+    @property
+    def __cache__(self):
+        """ The cache of results, if the function is pure """
+        return self._self_cache
+
+    @property
+    def __trace__(self):
+        """ Mapping the arguments of recorded calls to their last result, looked up in O(1).
+        Arguments are given as a tuple, or as a value if the function has only one parameter.
+        """
+        return self._self_index
+
+    @property
+    def __enabled__(self):
+        """ Whether calls are traced, for this function. Set it to a boolean, or a callable returning one on each call.
+        Calls are not traced anyway while recording is disabled for the process, see framableswitch.
+        """
+        enabled = self._self_switch
+        return enabled is None or bool(enabled() if callable(enabled) else enabled)
+
+    @__enabled__.setter
+    def __enabled__(self, enabled):
+        self._self_switch = enabled
+        self._self_gate = (enabled,) + self._self_gate[1:]
+
+
+def _framed_function(module, qualname):
+    """ Returning the framed function qualname of module, to unpickle it """
+    obj = importlib.import_module(module)
+    for name in qualname.split("."):
+        obj = vars(obj)[name]  # not getattr, which would bind methods
+        if isinstance(obj, (staticmethod, classmethod)):
+            obj = obj.__func__
+    return obj
+
+
+def framed_function_wrapper(wrapper=None, **options):
+    """ Decorator building a FramableFunctionWrapper around the decorated function, with these options. """
+    if wrapper is None:
+        return functools.partial(framed_function_wrapper, **options)
 
-# TODO : add a pure option declaration (to grab result from trace when possible)
-def framed_function_wrapper(wrapper):
     @functools.wraps(wrapper)
     def _wrapper(wrapped):
-        return FramableFunctionWrapper(wrapped, wrapper)
+        return FramableFunctionWrapper(wrapped, wrapper, **options)
 
     return _wrapper
 
 
-# TODO : add a pure option declaration (to optimize and grab result from trace on call when possible)
-def framed():
-    @framed_function_wrapper
+def framed(
+    maxlen: typing.Optional[int] = None,
+    sample: typing.Optional[FramableSampler] = None,
+    spill: typing.Union[None, bool, str, os.PathLike] = None,
+    spill_after: int = SPILL_AFTER,
+    pure: typing.Union[None, bool, FramableCache] = None,
+    timing: bool = False,
+    cputime: bool = False,
+    memory: bool = False,
+    exceptions: typing.Union[bool, str] = False,
+    calltree: bool = False,
+    enabled: typing.Union[None, bool, typing.Callable[[], bool]] = None,
+):
+    """ Decorator tracing calls of the decorated function in a frame.
+
+    If maxlen is specified, only the last maxlen calls are kept, in a fixed-capacity circular buffer.
+    If sample is specified (see framable.core.framablesampler), only sampled calls are recorded,
+    and the frame has a weight column, the number of calls each record stands for.
+    If spill is specified (a directory, or True for a temporary one), the trace is moved to files
+    every spill_after calls, and the frame maps them in memory. Arguments and results annotated as int, float
+    or bool are stored raw, others are pickled. Calls not spilled yet are read from memory.
+    If pure is specified (True, or a FramableCache to bound it), the function is assumed to return the same result
+    for the same arguments : results are cached, and calls with hashable arguments already cached are not made,
+    nor recorded. The cache is the __cache__ attribute of the decorated function.
+    If timing is specified, the frame has start (ns since epoch) and duration (ns) columns,
+    see framable.framabletiming to summarize them. If cputime is specified, it has a cputime column too,
+    the cpu time of the calling thread (ns). If memory is specified, it has an allocated column,
+    the bytes allocated by the call and not freed, measured by tracemalloc (started if needed, which slows down
+    all allocations). Coroutine and generator functions cannot be timed.
+    If exceptions is specified, calls raising an exception are recorded too, with a None result,
+    and the frame has exception (categorical, the exception type) and message columns, None for calls that returned.
+    Tracebacks are formatted only if exceptions is "traceback", in a traceback column.
+    If calltree is specified, the frame has callid, parent and depth columns : the id of the call, unique in the
+    process, the id of the recorded call it is made from (None at the root), and its depth in the call tree.
+    Calls not sampled are not in the tree, their recorded children are attached to their recorded parent.
+    Generator functions cannot be in a call tree.
+    If enabled is specified (a boolean, or a callable returning one on each call), calls are traced only when it is
+    true, otherwise the function is called directly. It can be switched at runtime by setting __enabled__.
+    Recording can also be disabled for the whole process, see framableswitch.
+    """
+
+    @framed_function_wrapper(
+        maxlen=maxlen, sample=sample, spill=spill, spill_after=spill_after, pure=pure,
+        timing=timing, cputime=cputime, memory=memory, exceptions=exceptions, calltree=calltree, enabled=enabled,
+    )
     def framed_decorator(wrapped, instance, args, kwargs):
 
         return wrapped(*args, **kwargs)
@@ -251,6 +833,23 @@ def framed():
     return framed_decorator
 
 
+def calltree(*functions):
+    """ Building the frame of the call tree of traced functions, one row per call, indexed by call id.
+    Functions are traced with framed(calltree=True), all of them if none are specified.
+    Rows have the columns of their function frame, and a function column with its qualified name.
+    """
+    import pandas as pd  # imported only when needed, it is slow to import
+
+    frames = [
+        f.__frame__.assign(function=f.__qualname__).set_index("callid") for f in (functions or list(_TREES))
+    ]
+    if not frames:
+        return pd.DataFrame(columns=["function", "parent", "depth"], index=pd.Index([], name="callid"))
+    tree = pd.concat(frames).sort_index()
+    tree["parent"] = tree["parent"].astype("Int64")  # None at the root
+    return tree[["function", "parent", "depth"] + [c for c in tree.columns if c not in ("function", "parent", "depth")]]
+
+
 if __name__ == "__main__":
 
     @framed()
@@ -261,7 +860,7 @@ if __name__ == "__main__":
 
     print(myfun.__frame__)
     assert len(myfun.__frame__) == 1
-    # assert myfun.__frame__[48] == 51  # TODO : access trace result via mapping syntax (getitem)
+    assert myfun.__trace__[48] == 51  # result of the call, looked up by its arguments
 
     # tracing a method (careful with instances and call time !)
 
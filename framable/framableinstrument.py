@@ -0,0 +1,139 @@
+"""
+Tracing all functions and methods of a module or a class at once, without changing their source.
+"""
+import fnmatch
+import inspect
+import types
+import weakref
+
+from framable.framablefunctionwrapper import FramableFunctionWrapper, framed
+
+_INSTRUMENTED = weakref.WeakKeyDictionary()  # module or class -> its Instrumentation
+
+
+class Instrumentation:
+    """ Functions and methods of a module or a class, traced in place by instrument().
+
+    Calls are traced only while the instrumentation is enabled, otherwise the functions are called directly.
+    """
+
+    def __init__(self, target, enabled=True):
+        self.target = target
+        self.enabled = enabled
+        self._originals = []  # (owner, name, original attribute), in instrumentation order
+        self.functions = {}  # qualified name -> traced function
+
+    def __call__(self):
+        """ Whether calls are traced, checked by each traced function on each call """
+        return self.enabled
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    @property
+    def frames(self):
+        """ The frames of the traced functions, by qualified name """
+        return {name: f.__frame__ for name, f in self.functions.items()}
+
+    def _wrap(self, owner, name, attribute, options):
+        """ Replacing the function, static method or class method attribute of owner by its traced version """
+        if isinstance(attribute, (staticmethod, classmethod)):
+            traced = framed(enabled=self, **options)(attribute.__func__)
+            setattr(owner, name, type(attribute)(traced))
+        else:
+            traced = framed(enabled=self, **options)(attribute)
+            setattr(owner, name, traced)
+        self._originals.append((owner, name, attribute))
+        self.functions[traced.__qualname__] = traced
+
+    def _restore(self):
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals.clear()
+        self.functions.clear()
+
+
+def _match(qualname, pattern):
+    """ Patterns without a dot match the name of methods too, so __*__ matches Kls.__init__ """
+    return fnmatch.fnmatchcase(qualname if "." in pattern else qualname.rpartition(".")[2], pattern)
+
+
+def _matches(qualname, include, exclude):
+    return any(_match(qualname, p) for p in include) and not any(_match(qualname, p) for p in exclude)
+
+
+def _functions(target):
+    """ Yielding (owner, name, attribute) for functions and methods defined in the module or class target.
+    Functions imported in a module, and methods inherited by a class, are not yielded.
+    """
+    module = target.__name__ if isinstance(target, types.ModuleType) else target.__module__
+    for name, attribute in list(vars(target).items()):
+        function = attribute.__func__ if isinstance(attribute, (staticmethod, classmethod)) else attribute
+        if isinstance(function, FramableFunctionWrapper):
+            continue  # already traced
+        if inspect.isfunction(function) and function.__module__ == module:
+            yield target, name, attribute
+        elif inspect.isclass(attribute) and attribute.__module__ == module and (
+            isinstance(target, types.ModuleType) or attribute.__qualname__.startswith(target.__qualname__ + ".")
+        ):
+            yield from _functions(attribute)  # classes defined in the target
+
+
+def instrument(target, include=("*",), exclude=("__*__",), enabled=True, **options):
+    """ Tracing the functions and methods defined in the module or class target, in place.
+
+    Functions are selected by their qualified name (Class.method for methods), matching one of the include patterns
+    and none of the exclude patterns (see fnmatch). Patterns without a dot match the name of methods too,
+    so special methods are excluded by default.
+    Other options are given to framed(), for all functions. If one of them cannot be traced, none is.
+    Returns the Instrumentation, to enable or disable tracing at runtime, and access the traced functions.
+    """
+    if isinstance(include, str):
+        include = (include,)
+    if isinstance(exclude, str):
+        exclude = (exclude,)
+    if target in _INSTRUMENTED:
+        raise ValueError(f"{target.__name__} is already instrumented, uninstrument it first")
+    instrumentation = Instrumentation(target, enabled)
+    try:
+        for owner, name, attribute in list(_functions(target)):
+            function = attribute.__func__ if isinstance(attribute, (staticmethod, classmethod)) else attribute
+            if _matches(function.__qualname__, include, exclude):
+                instrumentation._wrap(owner, name, attribute, options)
+    except BaseException:  # a function cannot be traced with these options, all or nothing
+        instrumentation._restore()
+        raise
+    _INSTRUMENTED[target] = instrumentation
+    return instrumentation
+
+
+def uninstrument(target):
+    """ Restoring the functions and methods of the module or class target, as they were before instrument() """
+    instrumentation = _INSTRUMENTED.pop(target, None)
+    if instrumentation is None:
+        raise ValueError(f"{target.__name__} is not instrumented")
+    instrumentation._restore()
+
+
+if __name__ == "__main__":
+
+    class Geometry:
+        def area(self, w: int, h: int) -> int:
+            return w * h
+
+        @staticmethod
+        def perimeter(w: int, h: int) -> int:
+            return 2 * (w + h)
+
+    instrumentation = instrument(Geometry)
+    g = Geometry()
+    g.area(2, 3)
+    Geometry.perimeter(2, 3)
+    instrumentation.disable()
+    g.area(4, 5)  # not traced
+
+    print(instrumentation.frames)
+    uninstrument(Geometry)
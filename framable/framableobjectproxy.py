@@ -1,5 +1,4 @@
 import wrapt
-import pandas as pd
 
 
 class FramableObjectProxy(wrapt.ObjectProxy):
@@ -15,6 +14,8 @@ class FramableObjectProxy(wrapt.ObjectProxy):
 
     @property
     def __series__(self):
+        import pandas as pd  # imported only when needed, it is slow to import
+
         return pd.Series(vars(self))
 
 
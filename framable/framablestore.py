@@ -0,0 +1,150 @@
+"""
+Saving frames of framables (traced functions, framable classes) to columnar files, and loading them back.
+This needs pyarrow, imported only when a frame is saved or loaded.
+"""
+
+import json
+import os
+import pickle
+
+from framable.core.framablebuffer import _dtype, annotation_typecodes
+from framable.core.framablemeta import FramableMeta
+
+CHUNKSIZE = 65536  # default number of rows written at once (a parquet row group, or a feather record batch)
+
+_FORMATS = {".parquet": "parquet", ".pq": "parquet", ".feather": "feather", ".arrow": "feather", ".ipc": "feather"}
+
+
+def _format(path, format):
+    if format is None:
+        format = _FORMATS.get(os.path.splitext(os.fspath(path))[1].lower())
+        if format is None:
+            raise ValueError(f"Cannot guess the format of {path}, format must be 'parquet' or 'feather'")
+    elif format not in ("parquet", "feather"):
+        raise ValueError(f"format must be 'parquet' or 'feather', not {format}")
+    return format
+
+
+def frame_typecodes(framable):
+    """ Mapping the columns of the frame of a framable to the typecode of their values, from its annotations.
+    Traced functions are annotated by their arguments and return annotations, framable classes by their fields.
+    """
+    if hasattr(framable, "_self_argtuple"):  # traced function, or method
+        return {
+            "start": "q", "end": "q", "call": "q", "step": "q",
+            **annotation_typecodes(
+                {**framable._self_argtuple.__annotations__, "result": framable._self_signature.return_annotation}
+            ),
+        }
+    if isinstance(framable, FramableMeta):
+        return annotation_typecodes(getattr(framable, "__annotations__", {}))
+    return {}
+
+
+def _arrow_column(values, typecode, encoder):
+    """ Returning the arrow array of a frame column, and whether its values are encoded """
+    import pyarrow as pa
+
+    if typecode is not None:
+        try:
+            return pa.array(values, type=pa.from_numpy_dtype(_dtype(typecode)), from_pandas=True), False
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+            pass  # values not fitting the type, the column is encoded
+    if values.dtype != object or all(v is None or isinstance(v, (str, bytes)) for v in values):
+        try:
+            return pa.array(values, from_pandas=True), False
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass  # categories of objects, like exception types, are encoded
+    return pa.array([encoder(v) for v in values], type=pa.binary()), True
+
+
+def save_frame(framable, path, format=None, encoder=pickle.dumps, chunksize=CHUNKSIZE):
+    """ Writing the frame of a framable (or a DataFrame) to a parquet or feather file.
+
+    The format is guessed from the path suffix if not specified.
+    Columns are typed from the annotations of the framable, and other columns of numbers or strings keep their type.
+    Other values are stored as bytes, by the encoder, and decoded when the frame is loaded.
+    The frame is taken once, without blocking the traced calls, and written chunksize rows at a time.
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    format = _format(path, format)
+    if isinstance(framable, pd.DataFrame):
+        frame, typecodes = framable, {}
+    else:
+        frame, typecodes = framable.__frame__, frame_typecodes(framable)
+
+    arrays, encoded = [pa.array(frame.index, from_pandas=True)], []
+    for i, name in enumerate(frame.columns):
+        array, isencoded = _arrow_column(frame.iloc[:, i], typecodes.get(name), encoder)
+        arrays.append(array)
+        if isencoded:
+            encoded.append(i)
+    metadata = {"index": frame.index.name, "encoded": encoded, "typecodes": typecodes}
+    table = pa.Table.from_arrays(
+        arrays, names=["__index__"] + [str(c) for c in frame.columns], metadata={"framable": json.dumps(metadata)}
+    )
+
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, path, row_group_size=chunksize)
+    else:
+        import pyarrow.feather as feather
+
+        feather.write_feather(table, path, chunksize=chunksize)
+
+
+def _pandas_column(column):
+    """ Returning the pandas values of an arrow column, with missing integers and booleans in nullable arrays """
+    import pandas as pd
+    import pyarrow as pa
+
+    if column.null_count and (pa.types.is_integer(column.type) or pa.types.is_boolean(column.type)):
+        dtype = "boolean" if pa.types.is_boolean(column.type) else str(column.type).replace("int", "Int")
+        return pd.array(column.to_pylist(), dtype=dtype.replace("uInt", "UInt"))
+    return column.to_pandas().values
+
+
+def load_frame(path, format=None, decoder=pickle.loads):
+    """ Reading a frame written by save_frame. Encoded values are decoded, as python objects. """
+    import pandas as pd
+
+    format = _format(path, format)
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+    else:
+        import pyarrow.feather as feather
+
+        table = feather.read_table(path)
+
+    metadata = json.loads(table.schema.metadata[b"framable"])
+    columns = [_pandas_column(c) for c in table.columns[1:]]
+    for i in metadata["encoded"]:
+        decoded = [None if v is None else decoder(v) for v in columns[i]]
+        columns[i] = pd.array(decoded, dtype=object)
+    frame = pd.DataFrame(
+        dict(enumerate(columns)), index=pd.Index(_pandas_column(table.column(0)), name=metadata["index"]), copy=False
+    )
+    frame.columns = table.column_names[1:]
+    return frame
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    from framable.framablefunctionwrapper import framed
+
+    @framed()
+    def myfun(a: int = 39, b: object = None) -> int:
+        return a + 3
+
+    myfun(48)
+    myfun(51, b={"some": "object"})
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        save_frame(myfun, os.path.join(tmpdir, "myfun.parquet"))
+        print(load_frame(os.path.join(tmpdir, "myfun.parquet")))
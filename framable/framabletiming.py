@@ -0,0 +1,47 @@
+"""
+Summaries of timed traces, built with framed(timing=True).
+
+Helpers take a frame, or a framable to summarize its frame.
+"""
+
+
+def _frame(framable):
+    import pandas as pd  # already imported, to build the frame
+
+    return framable if isinstance(framable, pd.DataFrame) else framable.__frame__
+
+
+def percentiles(framable, by=None, column="duration", q=(0.5, 0.9, 0.99)):
+    """ Returning the percentiles q of the column, one row per value of the by columns (arguments), or overall.
+    Columns of the result are the percentiles, and the number of calls.
+    """
+    frame = _frame(framable)
+    if by is None:
+        summary = frame[column].quantile(list(q)).to_frame(column).T
+        summary["count"] = len(frame)
+        return summary
+    grouped = frame.groupby(by)[column]
+    summary = grouped.quantile(list(q)).unstack()
+    summary["count"] = grouped.size()
+    return summary
+
+
+def slowest(framable, k=10, column="duration"):
+    """ Returning the k calls with the largest column, largest first """
+    return _frame(framable).nlargest(k, column)
+
+
+if __name__ == "__main__":
+    import time
+
+    from framable.framablefunctionwrapper import framed
+
+    @framed(timing=True)
+    def nap(ms: int) -> None:
+        time.sleep(ms / 1000)
+
+    for ms in (1, 2, 1, 5, 1):
+        nap(ms)
+
+    print(percentiles(nap, by="ms"))
+    print(slowest(nap, k=2))
@@ -0,0 +1,338 @@
+import collections
+import gc
+import os
+import tempfile
+import threading
+import typing
+import unittest
+import numpy as np
+import pandas as pd
+
+from framable.core.framablebuffer import (
+    FramableBuffer,
+    FramableColumnBuffer,
+    FramableRingBuffer,
+    annotation_typecodes,
+    framable_buffer,
+)
+
+
+class TestFramableBuffer(unittest.TestCase):
+    def test_framablebuffer(self):
+        Rec = collections.namedtuple("Rec", ["att1", "att2"])
+        buf = FramableBuffer(Rec._fields)
+
+        assert isinstance(buf.frame, pd.DataFrame)
+        assert buf.frame.empty
+        assert (buf.frame.columns == ["att1", "att2"]).all()
+
+        buf.append(Rec(42, "alice"))
+        assert len(buf) == 1
+        assert (buf.frame.iloc[0] == pd.Series(Rec(42, "alice")._asdict())).all()
+        assert pd.api.types.is_int64_dtype(buf.frame.dtypes["att1"])
+
+        # frame is cached until next append
+        frame = buf.frame
+        assert buf.frame is frame
+
+        buf.append(Rec(47, "bob"))
+        assert buf.frame is not frame
+        assert len(buf.frame) == 2
+        assert (buf.frame.iloc[1] == pd.Series(Rec(47, "bob")._asdict())).all()
+
+    def test_framablebuffer_nofields(self):
+        buf = FramableBuffer(())
+        buf.append(())
+        buf.append(())
+        assert len(buf) == 2
+        assert len(buf.frame) == 2
+
+    def test_framablebuffer_mapping(self):
+        buf = FramableBuffer()
+        assert buf.frame.empty
+
+        record = {"att1": 42}
+        buf.append(record)
+        record["att1"] = 0  # the buffer keeps the values as they were when appended
+        buf.append({"att1": 47, "att2": "bob"})
+
+        assert buf.fields == ("att1", "att2")
+        assert (buf.frame.att1 == [42, 47]).all()
+        assert buf.frame.att2.isna()[0]
+        assert buf.frame.att2[1] == "bob"
+
+
+    def test_framableringbuffer(self):
+        buf = FramableRingBuffer(("att1",), maxlen=3)
+        assert buf.frame.empty
+
+        buf.append((0,))
+        assert len(buf) == 1
+        assert (buf.frame.att1 == [0]).all()
+
+        for a in range(1, 8):
+            buf.append((a,))
+
+        assert len(buf) == 3
+        assert buf.generation == 8
+        # the last records, indexed by global sequence number
+        assert (buf.frame.att1 == [5, 6, 7]).all()
+        assert (buf.frame.index == [5, 6, 7]).all()
+
+        with self.assertRaises(ValueError):
+            FramableRingBuffer(("att1",), maxlen=0)
+
+
+    def test_framableringbuffer_threads(self):
+        buf = FramableRingBuffer(("att1",), maxlen=5, threads=True)
+        handles = []
+        for a in range(200):  # short-lived threads share the ring, it stays bounded
+            thread = threading.Thread(target=lambda a=a: handles.append(buf.append((a,))))
+            thread.start()
+            thread.join()
+
+        assert len(buf._segments) == 1
+        assert sum(s is not None for s in buf._ring.slots) == 5
+        assert len(buf) == 5 and buf.generation == 200
+        assert buf.frame.att1.tolist() == [195, 196, 197, 198, 199]
+        assert buf.frame.thread.nunique() <= 5
+        # handles are sequence numbers, evicted ones are ignored
+        assert buf.take([handles[0], handles[-1]]).att1.tolist() == [199]
+
+    def test_framablebuffer_take(self):
+        buf = FramableBuffer(("att1", "att2"))
+        handles = [buf.append((a, str(a))) for a in range(5)]
+
+        taken = buf.take([handles[4], handles[1]])
+        assert (taken.index == [1, 4]).all()
+        assert (taken.att1 == [1, 4]).all()
+        assert (taken.att2 == ["1", "4"]).all()
+        assert buf.take([]).empty
+
+        ring = FramableRingBuffer(("att1",), maxlen=2)
+        handles = [ring.append((a,)) for a in range(4)]
+        # evicted records are ignored
+        assert (ring.take([handles[0], handles[2], handles[3]]).att1 == [2, 3]).all()
+
+    def test_framablebuffer_threads(self):
+        buf = FramableBuffer(("att1",), threads=True)
+        buf.append((0,))
+
+        def append_from_thread(a):
+            buf.append((a,))
+
+        thread = threading.Thread(target=append_from_thread, args=(1,))
+        thread.start()
+        thread.join()
+        buf.append((2,))
+
+        # records are merged by sequence number, with the thread that appended them
+        assert (buf.frame.att1 == [0, 1, 2]).all()
+        assert (buf.frame.index == [0, 1, 2]).all()
+        assert (buf.frame.thread == [threading.get_ident(), thread.ident, threading.get_ident()]).all()
+
+    def test_framablecolumnbuffer(self):
+        buf = FramableColumnBuffer(("att1", "att2", "att3", "att4"), {"att1": "q", "att2": "d", "att3": "?"})
+        assert buf.typecodes == {"att1": "q", "att2": "d", "att3": "?"}
+        assert buf.frame.empty
+        assert pd.api.types.is_int64_dtype(buf.frame.dtypes["att1"])
+
+        buf.append((42, 1.5, True, "alice"))
+        buf.append((47, 2, False, "bob"))
+
+        frame = buf.frame
+        assert pd.api.types.is_int64_dtype(frame.dtypes["att1"])
+        assert pd.api.types.is_float_dtype(frame.dtypes["att2"])
+        assert pd.api.types.is_bool_dtype(frame.dtypes["att3"])
+        assert (frame.att1 == [42, 47]).all()
+        assert (frame.att2 == [1.5, 2.0]).all()
+        assert list(frame.att3) == [True, False]
+        assert list(frame.att4) == ["alice", "bob"]
+        assert (frame.index == [0, 1]).all()
+
+        # typed columns are views of the buffer storage, not copies
+        segment = buf._segments[0]
+        assert np.shares_memory(frame.att1.values, np.frombuffer(segment.columns[0], dtype="int64"))
+        assert not frame.att1.values.flags.writeable
+
+        # appending after reading still works, and the previous frame is unchanged
+        buf.append((51, 3.5, True, "carol"))
+        assert (buf.frame.att1 == [42, 47, 51]).all()
+        assert (frame.att1 == [42, 47]).all()
+
+        assert (buf.take([(segment, 2), (segment, 0)]).att1 == [42, 51]).all()
+        assert pd.api.types.is_bool_dtype(buf.take([(segment, 1)]).dtypes["att3"])
+
+    def test_framablecolumnbuffer_fallback(self):
+        buf = FramableColumnBuffer(("att1",), {"att1": "q"})
+        buf.append((42,))
+        buf.append((None,))  # doesnt fit the type, the column falls back to python objects
+        buf.append((2 ** 70,))
+        assert isinstance(buf._segments[0].columns[0], list)
+        assert buf.frame.att1[0] == 42
+        assert buf.frame.att1.isna()[1]
+        assert buf.frame.att1[2] == 2 ** 70
+
+    def test_framablecolumnbuffer_bool(self):
+        buf = FramableColumnBuffer(("att1",), {"att1": "?"})
+        buf.append((True,))
+        buf.extend([np.array([False])])
+        assert pd.api.types.is_bool_dtype(buf.frame.dtypes["att1"])
+        # only bools are stored as bools, anything else falls back to python objects
+        buf.append((2,))
+        buf.extend([[0]])
+        assert list(buf.frame.att1) == [True, False, 2, 0]
+        assert buf.take([(buf._segments[0], 2)]).att1.tolist() == [2]
+
+    def test_framablecolumnbuffer_threads(self):
+        buf = FramableColumnBuffer(("att1", "att2"), {"att1": "q"}, threads=True)
+        buf.append((0, "a"))
+
+        def append_from_thread(a):
+            buf.append((a, "b"))
+
+        thread = threading.Thread(target=append_from_thread, args=(1,))
+        thread.start()
+        thread.join()
+        buf.append((2, "c"))
+
+        assert pd.api.types.is_int64_dtype(buf.frame.dtypes["att1"])
+        assert (buf.frame.att1 == [0, 1, 2]).all()
+        assert list(buf.frame.att2) == ["a", "b", "c"]
+        assert (buf.frame.index == [0, 1, 2]).all()
+        assert (buf.frame.thread == [threading.get_ident(), thread.ident, threading.get_ident()]).all()
+
+    def test_framablebuffer_extend(self):
+        for buf in (
+            FramableBuffer(("att1", "att2")),
+            FramableRingBuffer(("att1", "att2"), maxlen=3),
+            FramableColumnBuffer(("att1", "att2"), {"att1": "q"}),
+        ):
+            buf.append((0, "a"))
+            segment, pos = buf.extend([[1, 2], ["b", "c"]])
+            assert pos == 1
+            assert buf.extend([np.arange(3, 5), ["d", "e"]]) == (segment, 3)
+            assert (buf.frame.att1 == [0, 1, 2, 3, 4][-len(buf):]).all()
+            assert list(buf.frame.att2) == ["a", "b", "c", "d", "e"][-len(buf):]
+            assert (buf.frame.index == [0, 1, 2, 3, 4][-len(buf):]).all()
+
+            with self.assertRaises(ValueError):
+                buf.extend([[1, 2], ["b"]])
+            with self.assertRaises(ValueError):
+                buf.extend([[1, 2]])
+
+        with self.assertRaises(TypeError):
+            FramableBuffer().extend([[1]])
+
+    def test_framablecolumnbuffer_extend_fallback(self):
+        buf = FramableColumnBuffer(("att1",), {"att1": "q"})
+        buf.extend([[1, 2]])
+        frame = buf.frame  # viewing the storage
+        buf.extend([[3, None]])  # doesnt fit the type, the column falls back to python objects
+        assert list(frame.att1) == [1, 2]
+        assert list(buf.frame.att1[:3]) == [1, 2, 3]
+        assert buf.frame.att1.isna()[3]
+
+    def test_framablecolumnbuffer_spill(self):
+        with tempfile.TemporaryDirectory() as spilldir:
+            buf = FramableColumnBuffer(("att1", "att2", "att3"), {"att1": "q", "att3": "?"}, spill=spilldir, spill_after=3)
+            handles = [buf.append((a, str(a), a % 2 == 0)) for a in range(7)]
+
+            assert len(buf) == 7
+            assert buf.spilled == 6
+            assert buf.take([handles[5], handles[1]]).att2.tolist() == ["1", "5"]
+            assert buf.take([handles[6]]).att1.tolist() == [6]
+            assert buf._segments[0].value(4, 2) is True
+
+            frame = buf.frame
+            assert frame.att1.tolist() == list(range(7))
+            assert frame.att2.tolist() == [str(a) for a in range(7)]
+            assert frame.att3.tolist() == [a % 2 == 0 for a in range(7)]
+            buf.append((7, "7", False))
+            assert buf.frame.att1.tolist() == list(range(8))
+            assert buf.spilled == 6  # reading the frame doesnt spill the records still in memory
+            assert len(buf._segments[0].chunks[1]) == 2
+
+            buf.spill()
+            assert buf.spilled == 8
+            assert isinstance(buf.frame.att1.values, np.memmap)
+            assert not buf.frame.att1.values.flags.writeable
+            assert buf.frame.att1.tolist() == list(range(8))
+
+            # appending after reading, including values that dont fit the type, or cannot be pickled
+            buf.extend([[8, None, 10], [threading.Lock(), "9", "10"], [True, False, True]])
+            assert frame.att1.tolist() == list(range(7))
+            assert buf.frame.att1.dtype == "Int64"  # None is missing, the other values are still memory mapped
+            assert isinstance(buf.frame.att1.array._data, np.memmap)
+            assert buf.frame.att1.isna().tolist() == [False] * 9 + [True, False]
+            assert buf.frame.att2[10] == "10"
+            assert buf._segments[0].value(8, 0) == 8
+            assert buf._segments[0].value(9, 0) is None
+            assert buf.take([handles[6]]).att1.tolist() == [6]
+
+            buf.append(("other", "11", True))  # other misfits are python objects
+            assert buf.frame.att1.tolist()[-3:] == [None, 10, "other"]
+
+            spillpath = buf._spilldir
+            assert os.listdir(spillpath)
+            del buf, frame
+            gc.collect()
+            assert not os.path.exists(spillpath)
+
+        with self.assertRaises(ValueError):
+            framable_buffer(("att1",), maxlen=3, spill=True)
+
+    def test_framablecolumnbuffer_spill_threads(self):
+        buf = FramableColumnBuffer(("att1",), {"att1": "q"}, threads=True, spill=True, spill_after=2)
+        buf.append((0,))
+        buf.append((None,))
+        thread = threading.Thread(target=lambda: buf.extend([[1, 2, 3]]))
+        thread.start()
+        thread.join()
+        buf.append((4,))
+
+        assert buf.spilled == 5
+        assert buf.frame.att1.dtype == "Int64"
+        assert buf.frame.att1.isna().tolist() == [False, True, False, False, False, False]
+        assert buf.frame.att1.fillna(-1).tolist() == [0, -1, 1, 2, 3, 4]
+
+    def test_framablebuffer_categorical(self):
+        for buf in (
+            FramableBuffer(("att1", "att2"), categorical=("att2",)),
+            FramableRingBuffer(("att1", "att2"), maxlen=3, categorical=("att2",)),
+            FramableColumnBuffer(("att1", "att2"), {"att1": "q"}, categorical=("att2",)),
+        ):
+            for a in range(4):
+                buf.append((a, "odd" if a % 2 else None))
+            assert buf.frame.att2.dtype == "category"
+            assert buf.frame.att2.cat.categories.tolist() == ["odd"]
+            assert buf.frame.att1.dtype != "category"
+
+    def test_annotation_typecodes(self):
+        assert annotation_typecodes({"a": int, "b": float, "c": bool, "d": str, "e": typing.List[int]}) == {
+            "a": "q", "b": "d", "c": "?"
+        }
+        assert annotation_typecodes({"a": np.int32, "b": np.float32}) == {"a": "i", "b": "f"}
+        assert annotation_typecodes({"a": "int", "b": "str"}) == {"a": "q"}
+
+    def test_framablebuffer_concurrent_readers(self):
+        for buf in (FramableBuffer(("att1",)), FramableRingBuffer(("att1",), maxlen=1000)):
+
+            def read():
+                for _ in range(50):
+                    frame = buf.frame
+                    assert len(frame) <= len(buf)
+
+            readers = [threading.Thread(target=read) for _ in range(4)]
+            for r in readers:
+                r.start()
+            for a in range(500):
+                buf.append((a,))
+            for r in readers:
+                r.join()
+
+            # a frame memoized by a reader is never served for a later generation
+            assert len(buf.frame) == 500
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import concurrent.futures
+import unittest
+
+from framable.core.framablecache import FramableCache
+
+
+class TestFramableCache(unittest.TestCase):
+    def test_framablecache_lru(self):
+        cache = FramableCache(maxsize=2)
+        cache[(1,)] = 2
+        cache[(2,)] = 3
+        assert cache[(1,)] == 2
+        cache[(3,)] = 4  # evicting (2,), the least recently used one
+        assert (2,) not in cache
+        assert (1,) in cache
+        with self.assertRaises(KeyError):
+            cache[(2,)]
+        with self.assertRaises(TypeError):
+            cache[([],)]
+
+        assert cache.frame.to_dict("records") == [
+            {"hits": 1, "misses": 1, "evictions": 1, "expirations": 0, "size": 2}
+        ]
+
+        with self.assertRaises(ValueError):
+            FramableCache(maxsize=0)
+
+    def test_framablecache_ttl(self):
+        now = 0.0
+        cache = FramableCache(ttl=10, clock=lambda: now)
+        cache[(1,)] = 2
+        now = 5.0
+        assert cache[(1,)] == 2
+        now = 10.0
+        with self.assertRaises(KeyError):
+            cache[(1,)]
+        assert len(cache) == 0
+        assert cache.expirations == 1
+
+        with self.assertRaises(ValueError):
+            FramableCache(ttl=0)
+
+    def test_framablecache_threads(self):
+        cache = FramableCache(maxsize=10)
+
+        def use(a):
+            try:
+                cache[(a % 20,)]
+            except KeyError:
+                cache[(a % 20,)] = a
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(use, range(10000)))
+
+        assert cache.hits + cache.misses == 10000
+        assert len(cache) == 10
+
+
+if __name__ == "__main__":
+    unittest.main()
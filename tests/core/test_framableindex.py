@@ -0,0 +1,51 @@
+import unittest
+
+from framable.core.framablebuffer import FramableBuffer, FramableColumnBuffer, FramableRingBuffer
+from framable.core.framableindex import FramableIndex
+
+
+class TestFramableIndex(unittest.TestCase):
+    def test_framableindex(self):
+        buf = FramableColumnBuffer(("a", "b", "result"), {"a": "q", "result": "q"})
+        buf.append((1, "x", 42))
+        buf.append((2, "y", 51))
+        index = FramableIndex(buf, nkeys=2, value=2)
+
+        assert index[(1, "x")] == 42
+        buf.append((1, "x", 43))  # indexed on the next lookup
+        assert index[(1, "x")] == 43
+        assert (2, "y") in index
+        assert (3, "z") not in index
+        assert set(index) == {(1, "x"), (2, "y")}
+        assert index.take([(1, "x"), (2, "y")]).result.tolist() == [42, 51, 43]
+        assert index.between((1, "a"), (1, "z")).result.tolist() == [42, 43]
+
+        byb = index.prefixed((1,))
+        assert byb["x"] == 43
+        assert list(byb) == ["x"]
+        assert len(byb) == 1
+
+    def test_framableindex_unhashable(self):
+        buf = FramableBuffer(("a", "result"))
+        buf.append(([1], 2))
+        buf.append((3, 4))
+        index = FramableIndex(buf, nkeys=1, value=1)
+        assert index[3] == 4
+        assert len(index) == 1
+
+    def test_framableindex_bounded(self):
+        buf = FramableRingBuffer(("a", "result"), maxlen=2)
+        index = FramableIndex(buf, nkeys=1, value=1)
+        for a in range(5000):
+            buf.append((a, a + 1))
+            if a % 100 == 0:
+                assert index[a] == a + 1
+
+        assert 4997 not in index  # dropped from the buffer
+        assert index[4999] == 5000
+        assert sorted(index) == [4998, 4999]
+        assert index._size < 5000  # handles of dropped records are pruned
+
+
+if __name__ == "__main__":
+    unittest.main()
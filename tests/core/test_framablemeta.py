@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 import pandas as pd
 from pandas.core import dtypes
 
@@ -92,6 +93,198 @@ class TestFramableMeta(unittest.TestCase):
         # checking the second record is the instance we just created
         assert (myobj2.__series__ == pd.Series(myobj2._asdict())).all()
 
+    def test_framablemeta_frame_memoized(self):
+        class MyKls(metaclass=FramableMeta):
+            att1: int = 0
+            att2: int = 42
+
+        MyKls(att1=42, att2=51)
+        frame = MyKls.__frame__
+        # no new instance, same frame
+        assert MyKls.__frame__ is frame
+
+        # default instance is the initial one, it is not recorded
+        assert MyKls() is MyKls.__initial__
+        assert MyKls.__frame__ is frame
+
+        MyKls(att1=47)
+        assert MyKls.__frame__ is not frame
+        assert len(MyKls.__frame__) == 2
+        assert MyKls.__frame__.iloc[1].att2 == 42
+
+
+    def test_framablemeta_maxlen(self):
+        class MyKls(metaclass=FramableMeta, maxlen=2):
+            att1: int = 0
+
+        for a in range(1, 6):
+            MyKls(att1=a)
+
+        assert len(MyKls.__frame__) == 2
+        assert (MyKls.__frame__.att1 == [4, 5]).all()
+
+    def test_framablemeta_typed(self):
+        class MyKls(metaclass=FramableMeta):
+            att1: int = 0
+            att2: float = 0.0
+            att3: bool = False
+            att4: str = ""
+
+        assert MyKls._classbuffer.typecodes == {"att1": "q", "att2": "d", "att3": "?"}
+        # typed even when empty
+        assert pd.api.types.is_float_dtype(MyKls.__frame__.dtypes["att2"])
+
+        MyKls(att1=42, att2=1.5, att3=True, att4="alice")
+        MyKls(att1=47)
+
+        assert pd.api.types.is_int64_dtype(MyKls.__frame__.dtypes["att1"])
+        assert pd.api.types.is_float_dtype(MyKls.__frame__.dtypes["att2"])
+        assert pd.api.types.is_bool_dtype(MyKls.__frame__.dtypes["att3"])
+        assert list(MyKls.__frame__.att4) == ["alice", ""]
+
+    def test_framablemeta_from_records(self):
+        class MyKls(metaclass=FramableMeta):
+            att1: int = 0
+            att2: str = "dflt"
+
+        MyKls(att1=1, att2="alice")
+        batch = MyKls.from_records([(2, "bob"), (3,)])
+        assert len(batch) == 2
+        assert batch[0] == MyKls(att1=2, att2="bob")  # also recorded, as a comparison point
+        assert batch[-1] == (3, "dflt")
+        assert isinstance(batch[1], MyKls)
+        assert list(batch[1:]) == [(3, "dflt")]
+        with self.assertRaises(IndexError):
+            batch[2]
+
+        mappings = MyKls.from_records([{"att1": 4}, {"att2": "dave"}])
+        assert list(mappings) == [(4, "dflt"), (0, "dave")]
+
+        assert list(MyKls.__frame__.att1) == [1, 2, 3, 2, 4, 0]
+        assert list(MyKls.__frame__.att2) == ["alice", "bob", "dflt", "bob", "dflt", "dave"]
+
+        assert len(MyKls.from_records([])) == 0
+        with self.assertRaises(TypeError):
+            MyKls.from_records([(1, "a", "extra")])
+        with self.assertRaises(TypeError):
+            MyKls.from_records([{"att3": 1}])
+        assert len(MyKls.__frame__) == 6
+
+    def test_framablemeta_from_columns(self):
+        class MyKls(metaclass=FramableMeta):
+            att1: int = 0
+            att2: float = 0.5
+
+        batch = MyKls.from_columns({"att1": np.arange(1000)})
+        assert len(batch) == 1000
+        assert batch[999].att1 == 999
+        assert batch[999].att2 == 0.5
+
+        assert len(MyKls.__frame__) == 1000
+        assert pd.api.types.is_int64_dtype(MyKls.__frame__.dtypes["att1"])
+        assert (MyKls.__frame__.att1 == np.arange(1000)).all()
+        assert (MyKls.__frame__.att2 == 0.5).all()
+
+        with self.assertRaises(ValueError):
+            MyKls.from_columns({"att1": [1, 2], "att2": [1.0]})
+        with self.assertRaises(TypeError):
+            MyKls.from_columns({"att3": [1]})
+        assert len(MyKls.__frame__) == 1000
+
+    def test_framablemeta_compact(self):
+        class MyKls(metaclass=FramableMeta, compact=True):
+            att1: int = 0
+            att2: str = "dflt"
+
+        myobj = MyKls(att1=42)
+        assert myobj.att1 == 42
+        assert myobj.att2 == "dflt"
+        assert not hasattr(myobj, "__dict__")
+        with self.assertRaises(AttributeError):
+            myobj.att1 = 51
+
+        # fields are read from the tuple, even for instances not built by the class call
+        assert MyKls._make((47, "bob")).att1 == 47
+        assert MyKls.__initial__ == (0, "dflt")
+
+        assert (myobj.__series__ == pd.Series({"att1": 42, "att2": "dflt"})).all()
+        assert list(MyKls.__frame__.att1) == [42]
+
+    def test_framablemeta_instance_dict(self):
+        class MyKls(metaclass=FramableMeta):
+            att1: int = 0
+
+        # non compact instances still have their values in their __dict__
+        assert vars(MyKls(att1=42)) == {"att1": 42}
+
+    def test_framablemeta_flyweight(self):
+        class MyKls(metaclass=FramableMeta, flyweight=True):
+            att1: int = 0
+            att2: bool = False
+            att3: str = "dflt"
+
+        assert MyKls() is MyKls.__initial__
+        assert MyKls.__initial__ == (0, False, "dflt")
+        assert MyKls.__frame__.empty
+
+        myobj = MyKls(att1=42, att2=True)
+        assert isinstance(myobj, MyKls)
+        assert not hasattr(myobj, "__dict__")
+        assert myobj.att1 == 42
+        assert myobj.att2 is True
+        assert myobj.att3 == "dflt"
+        assert myobj == (42, True, "dflt")
+        assert (42, True, "dflt") == myobj
+        assert list(myobj) == [42, True, "dflt"]
+        assert myobj[0] == 42 and len(myobj) == 3
+        assert hash(myobj) == hash((42, True, "dflt"))
+        assert repr(myobj) == "MyKls(att1=42, att2=True, att3='dflt')"
+        assert (myobj.__series__ == pd.Series({"att1": 42, "att2": True, "att3": "dflt"})).all()
+        with self.assertRaises(AttributeError):
+            myobj.att1 = 51
+        with self.assertRaises(TypeError):
+            MyKls(att4=1)
+
+        # values are in the class frame only, which can be read without copy
+        frame = MyKls.__frame__
+        assert list(frame.att1) == [42]
+        assert np.shares_memory(frame.att1.values, np.frombuffer(myobj._segment.columns[0], dtype="int64"))
+
+        # reading the frame doesnt prevent creating more instances
+        myobj2 = MyKls(att1=47)
+        assert myobj.att1 == 42
+        assert myobj2.att1 == 47
+        assert list(MyKls.__frame__.att1) == [42, 47]
+
+        batch = MyKls.from_columns({"att1": [1, 2, 3]})
+        assert isinstance(batch[0], MyKls)
+        assert batch[-1].att1 == 3
+        assert list(batch[1:]) == [(2, False, "dflt"), (3, False, "dflt")]
+        assert list(MyKls.__frame__.att1) == [42, 47, 1, 2, 3]
+
+        # a value that is not a bool is not recorded as one
+        assert MyKls(att2=2).att2 == 2
+        assert myobj.att2 is True
+
+        with self.assertRaises(TypeError):
+            class MyBoundedKls(metaclass=FramableMeta, flyweight=True, maxlen=2):
+                att1: int = 0
+
+    def test_framablemeta_spill(self):
+        class MyKls(metaclass=FramableMeta, spill=True, spill_after=2):
+            att1: int = 0
+            att2: str = "dflt"
+
+        for a in range(5):
+            MyKls(att1=a)
+
+        assert MyKls._classbuffer.spilled == 4
+        assert (MyKls.__frame__.att1 == list(range(5))).all()
+        assert (MyKls.__frame__.att2 == "dflt").all()
+
+        with self.assertRaises(TypeError):
+            class MyFlyweightKls(metaclass=FramableMeta, flyweight=True, spill=True):
+                att1: int = 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,61 @@
+import concurrent.futures
+import sys
+import unittest
+
+from framable.core.framablesampler import EverySampler, RateSampler, TokenBucketSampler
+
+
+class TestFramableSampler(unittest.TestCase):
+    def test_everysampler(self):
+        every = EverySampler(3)
+        assert [every() for _ in range(7)] == [3, 0, 0, 3, 0, 0, 3]
+
+        with self.assertRaises(ValueError):
+            EverySampler(0)
+
+    def test_ratesampler(self):
+        rate = RateSampler(0.25, seed=42)
+        weights = [rate() for _ in range(10000)]
+        assert set(weights) == {0, 4}
+        # the sum of weights estimates the number of calls
+        assert 9000 < sum(weights) < 11000
+
+        with self.assertRaises(ValueError):
+            RateSampler(0)
+
+    def test_tokenbucketsampler(self):
+        now = 0.0
+        bucket = TokenBucketSampler(per_second=2, clock=lambda: now)
+
+        # burst of 2 calls, then nothing until tokens are refilled
+        assert [bucket() for _ in range(5)] == [1, 1, 0, 0, 0]
+        now = 0.5
+        # the recorded call stands for the skipped ones
+        assert [bucket(), bucket()] == [4, 0]
+
+
+    def test_samplers_threads(self):
+        switchinterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # switching threads as often as possible
+        try:
+            every = EverySampler(4)
+            bucket = TokenBucketSampler(per_second=10, burst=10, clock=lambda: 0.0)  # no refill
+
+            def sample(sampler):
+                return [sampler() for _ in range(1000)]
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+                everyweights = sum(pool.map(sample, [every] * 8), [])
+                bucketweights = sum(pool.map(sample, [bucket] * 8), [])
+        finally:
+            sys.setswitchinterval(switchinterval)
+
+        # the sum of weights is the number of calls
+        assert sum(everyweights) == 8000
+        assert len([w for w in everyweights if w]) == 2000
+        # the rate is not exceeded, and calls skipped since the last recorded one are still counted
+        assert len([w for w in bucketweights if w]) == 10
+        assert sum(bucketweights) + bucket._skipped == 8000
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from framable.core import framableswitch
+from framable.core.framablemeta import FramableMeta
+
+
+class TestFramableSwitch(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(framableswitch.enable)
+
+    def test_framableclass_disabled(self):
+        class MyKls(metaclass=FramableMeta):
+            att1: int = 0
+
+        MyKls(att1=1)
+        framableswitch.disable()
+        assert not framableswitch.is_enabled()
+        obj = MyKls(att1=2)
+        assert obj.att1 == 2  # still a working instance, only not recorded
+        assert len(MyKls.from_columns({"att1": [3, 4]})) == 2
+        framableswitch.enable()
+        MyKls(att1=5)
+        assert MyKls.__frame__.att1.tolist() == [1, 5]
+
+    def test_flyweight_disabled(self):
+        class MyFlyweightKls(metaclass=FramableMeta, flyweight=True):
+            att1: int = 0
+
+        framableswitch.disable()
+        obj = MyFlyweightKls(att1=2)  # the value is only in the class frame, it is always stored
+        assert obj.att1 == 2
+        assert MyFlyweightKls.__frame__.att1.tolist() == [2]
+
+    def test_environment_variable(self):
+        for value, enabled in (("1", False), ("true", False), ("0", True), ("", True)):
+            proc = subprocess.run(
+                [sys.executable, "-c", "from framable.core import framableswitch; print(framableswitch.enabled)"],
+                env={**os.environ, framableswitch.ENVIRONMENT_VARIABLE: value}, capture_output=True, text=True,
+                check=True,
+            )
+            assert proc.stdout.strip() == str(enabled), value
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -67,6 +67,45 @@ class TestFramableClassProxy(unittest.TestCase):
         # checking the first record is the instance we just created
         assert (MyOtherKlsProxy.__frame__.iloc[0] == pd.Series(vars(myotherobj))).all()
 
+    def test_framableclass_frame_memoized(self):
+
+        class MyKls:
+
+            def __init__(self, att1, att2=None):
+                self.att1 = att1
+                if att2 is not None:
+                    self.att2 = att2  # attribute only on some instances
+
+        MyKlsProxy = FramableClassProxy(MyKls)
+
+        MyKlsProxy(42)
+        frame = MyKlsProxy.__frame__
+        assert MyKlsProxy.__frame__ is frame
+        assert (frame.columns == ['att1']).all()
+
+        MyKlsProxy(47, 53)
+        assert MyKlsProxy.__frame__ is not frame
+        assert (MyKlsProxy.__frame__.columns == ['att1', 'att2']).all()
+        assert MyKlsProxy.__frame__.att2.isna()[0]
+
+        # the wrapped class is left untouched
+        assert not hasattr(MyKls, '_self_classbuffer')
+
+
+    def test_framableclass_maxlen(self):
+
+        class MyKls:
+
+            def __init__(self, att1):
+                self.att1 = att1
+
+        MyKlsProxy = FramableClassProxy(MyKls, maxlen=2)
+        for a in range(1, 6):
+            MyKlsProxy(a)
+
+        assert len(MyKlsProxy.__frame__) == 2
+        assert (MyKlsProxy.__frame__.att1 == [4, 5]).all()
+
 
 if __name__ == '__main__':
     unittest.main()
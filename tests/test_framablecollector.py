@@ -0,0 +1,115 @@
+import concurrent.futures
+import multiprocessing
+import os
+import pickle
+import threading
+import unittest
+
+from framable.framablecollector import FramableCollector
+from framable.framablefunctionwrapper import framed
+
+
+# defined at module level, so spawned workers find them
+
+
+@framed()
+def square(a: int) -> int:
+    return a * a
+
+
+@framed(exceptions=True)
+def lock(a: int) -> object:
+    return threading.Lock()  # cannot be pickled
+
+
+@framed(maxlen=5)
+def recent(a: int) -> int:
+    return a
+
+
+class Counter:
+    def __init__(self, start: int = 0):
+        self.start = start
+
+    @framed()
+    def add(self, a: int) -> int:
+        return self.start + a
+
+
+class TestFramableCollector(unittest.TestCase):
+
+    def test_pickle_by_reference(self):
+        assert pickle.loads(pickle.dumps(square)) is square
+        assert pickle.loads(pickle.dumps(Counter.add)) is vars(Counter)["add"]
+        assert pickle.loads(pickle.dumps(Counter(1).add))(2) == 3
+
+        @framed()
+        def local(a: int) -> int:
+            return a
+
+        with self.assertRaises(pickle.PicklingError):
+            pickle.dumps(local)
+
+    def test_collect_process_pool(self):
+        for method, offset in (("fork", 0), ("spawn", 100)):
+            with self.subTest(method=method):
+                context = multiprocessing.get_context(method)
+                args = range(offset, offset + 10)
+                square(offset - 1)
+                with FramableCollector(square, lock, batch=2, interval=0.01, context=context) as collector:
+                    with concurrent.futures.ProcessPoolExecutor(
+                        max_workers=2, mp_context=context, initializer=collector.initializer
+                    ) as executor:
+                        assert list(executor.map(square, args)) == [a * a for a in args]
+                        futures = [executor.submit(lock, a) for a in args[:3]]
+                        # locks cannot be returned, but their calls are recorded in the workers
+                        assert all(isinstance(f.exception(), TypeError) for f in futures)
+
+                frame = square.__frame__
+                assert frame.columns.tolist() == ["a", "result", "thread", "pid"]
+                frame = frame[frame.a.between(offset - 1, offset + 9)]
+                assert sorted(frame.a) == list(range(offset - 1, offset + 10))  # each call once
+                assert (frame.result == frame.a ** 2).all()
+                assert frame[frame.a == offset - 1].pid.tolist() == [os.getpid()]
+                assert os.getpid() not in frame[frame.a != offset - 1].pid.values
+
+                frame = lock.__frame__
+                frame = frame[frame.a.between(offset, offset + 9)]
+                assert sorted(frame.a) == list(args[:3])
+                assert frame.result.iloc[-1].startswith("<unlocked _thread.lock")  # sent as its repr
+
+    def test_collect_pool_methods(self):
+        context = multiprocessing.get_context("fork")
+        with FramableCollector(Counter(0).add, context=context) as collector:
+            pool = context.Pool(2, initializer=collector.initializer)
+            assert pool.map(Counter(10).add, range(4)) == [10, 11, 12, 13]
+            pool.close()
+            pool.join()
+
+        frame = Counter.add.__frame__
+        assert sorted(frame.a) == [0, 1, 2, 3]
+        assert {c.start for c in frame.self} == {10}  # copies of the instance, from the workers
+
+        with self.assertRaises(ValueError):
+            FramableCollector(square, batch=0)
+
+    def test_collect_bounded(self):
+        context = multiprocessing.get_context("fork")
+        with FramableCollector(recent, batch=3, context=context) as collector:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=1, mp_context=context, initializer=collector.initializer
+            ) as executor:
+                list(executor.map(recent, range(100)))
+        recent(-1)
+
+        frame = recent.__frame__
+        assert frame.a.tolist() == [-1] + list(range(95, 100))
+
+        # records received from many workers, or over many intervals, are bounded too
+        recent._self_collected.add(1, [(seq, 0, (seq, seq)) for seq in range(100, 120)])
+        assert len(recent._self_collected) == 5  # like the trace, only the last maxlen records are kept
+        assert recent.__frame__.a.tolist() == [-1] + list(range(115, 120))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,25 @@
 import asyncio
+import concurrent.futures
+import gc
 import inspect
+import sys
+import tempfile
+import tracemalloc
 import unittest
+import unittest.mock
+import weakref
 from asyncio import Task
 
+import numpy as np
+import pandas  # imported upfront, the first frame would import it, and exceed hypothesis deadlines
 import wrapt
 from hypothesis import given
 import hypothesis.strategies as st
 
-from framable.framablefunctionwrapper import framed
+from framable.core import framableswitch
+from framable.core.framablecache import FramableCache
+from framable.core.framablesampler import EverySampler
+from framable.framablefunctionwrapper import calltree, framed, signature_tuple
 
 
 def function_test(*args, **kwargs):
@@ -133,6 +145,530 @@ class TestFramableFunctionWrapper(unittest.TestCase):
         assert resa == args
         assert reskwa == kwargs
 
+    def test_framable_boundfunction_refinement_memoized(self):
+
+        class Traced:
+            @framed()
+            def method(self, a: int = 39):
+                return a + 2
+
+        t1, t2 = Traced(), Traced()
+        # method lookup doesnt build new tuple classes for each instance
+        assert t1.method._self_argtuple is t2.method._self_argtuple
+        assert t1.method._self_resulttuple is t2.method._self_resulttuple
+        assert t1.method._self_argtuple.__annotations__["self"] == Traced.__qualname__
+
+        # refinements are evicted with the instance type
+        class SubTraced(Traced):
+            pass
+
+        assert SubTraced().method._self_argtuple is not Traced().method._self_argtuple
+        subtype = weakref.ref(SubTraced)
+        del SubTraced
+        gc.collect()
+        assert subtype() is None
+
+    @given(args=st.lists(st.integers(), max_size=5),
+           kwargs=st.dictionaries(keys=st.sampled_from(["a", "b", "c", "d", "e"]), values=st.integers()))
+    def test_argbinder_matches_signature_bind(self, args, kwargs):
+
+        def layout_varargs(a, b=3, *args, d, e=0, **kwargs): pass
+
+        def layout_defaults(a=0, b=None, c=False, d=42): pass
+
+        def layout_kwonly(a, b=1, *, d=2): pass
+
+        # Note divmod has positional only parameters
+        for fun in (divmod, layout_kwonly, layout_varargs, layout_defaults, function_test):
+            sig, argtuple, argbinder, _, _ = signature_tuple(fun)
+            try:
+                expected = argtuple(**sig.bind(*args, **kwargs).arguments)
+            except TypeError:
+                with self.assertRaises(TypeError):
+                    argbinder(*args, **kwargs)
+            else:
+                assert argbinder(*args, **kwargs) == expected
+
+        # before python 3.8, positional only parameters are bound with Signature.bind
+        with unittest.mock.patch.object(sys, "version_info", (3, 7)):
+            sig, argtuple, argbinder, _, _ = signature_tuple(divmod)
+        try:
+            expected = argtuple(**sig.bind(*args, **kwargs).arguments)
+        except TypeError:
+            with self.assertRaises(TypeError):
+                argbinder(*args, **kwargs)
+        else:
+            assert argbinder(*args, **kwargs) == expected
+
+    def test_framable_function_maxlen(self):
+
+        @framed(maxlen=3)
+        def inc(a: int) -> int:
+            return a + 1
+
+        for a in range(10):
+            inc(a)
+
+        assert len(inc.__frame__) == 3
+        assert (inc.__frame__.a == [7, 8, 9]).all()
+        assert (inc.__frame__.result == [8, 9, 10]).all()
+        assert (inc.__frame__.index == [7, 8, 9]).all()
+
+    def test_framable_function_sample(self):
+
+        @framed(sample=EverySampler(4))
+        def inc(a: int) -> int:
+            return a + 1
+
+        assert [inc(a) for a in range(10)] == list(range(1, 11))
+
+        # only sampled calls are recorded, with their weight
+        assert (inc.__frame__.a == [0, 4, 8]).all()
+        assert (inc.__frame__.result == [1, 5, 9]).all()
+        assert (inc.__frame__.weight == 4).all()
+
+        class Traced:
+            @framed(sample=EverySampler(2))
+            def method(self, a: int = 39):
+                return a + 2
+
+        t = Traced()
+        assert [t.method(a) for a in range(4)] == [2, 3, 4, 5]
+        assert (t.method.__frame__.a == [0, 2]).all()
+        assert (t.method.__frame__.weight == 2).all()
+
+    def test_framable_boundfunction_instance_frame(self):
+
+        class Traced:
+            @framed(maxlen=4)
+            def method(self, a: int = 39):
+                return a + 2
+
+        t1, t2 = Traced(), Traced()
+        t1.method(1)
+        t2.method(2)
+        t1.method(3)
+        # calling via the class is recorded for the instance as well
+        Traced.method(t2, 4)
+
+        assert (t1.method.__frame__.a == [1, 3]).all()
+        assert (t1.method.__frame__.index == [0, 2]).all()
+        assert (t2.method.__frame__.a == [2, 4]).all()
+        assert (t2.method.__frame__.result == [4, 6]).all()
+        assert len(Traced.method.__frame__) == 4
+
+        # evicted calls are not in the instance frame anymore
+        t2.method(5)
+        t2.method(6)
+        assert (t1.method.__frame__.a == [3]).all()
+
+        # once all the instance calls are evicted, the instance can be collected, and its index entry is dropped
+        t1id = id(t1)
+        del t1
+        t2.method(7)
+        gc.collect()
+        assert t1id not in Traced.__dict__["method"]._self_instances
+
+    def test_framable_function_threads(self):
+
+        @framed()
+        def inc(a: int) -> int:
+            return a + 1
+
+        switchinterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # switching threads as often as possible
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(pool.map(inc, range(20000)))
+        finally:
+            sys.setswitchinterval(switchinterval)
+
+        assert results == list(range(1, 20001))
+        frame = inc.__frame__
+        # no row lost, each with its own sequence number
+        assert len(frame) == 20000
+        assert (frame.index == range(20000)).all()
+        assert sorted(frame.a) == list(range(20000))
+        # arguments and results are aligned
+        assert (frame.result == frame.a + 1).all()
+        assert frame.thread.nunique() > 1
+
+    def test_framable_coroutine_function(self):
+
+        @framed()
+        async def inc(a: int) -> int:
+            await asyncio.sleep(0)
+            return a + 1
+
+        assert inspect.iscoroutinefunction(inc)
+
+        async def main():
+            return await asyncio.gather(*(inc(a) for a in range(1000)))
+
+        assert asyncio.run(main()) == list(range(1, 1001))
+
+        frame = inc.__frame__
+        assert len(frame) == 1000
+        # the awaited result is recorded, not the coroutine
+        assert (frame.result == frame.a + 1).all()
+        assert (frame.start <= frame.end).all()
+
+        class Traced:
+            @framed()
+            async def method(self, a: int = 39):
+                return a + 2
+
+        t = Traced()
+        assert asyncio.run(t.method(40)) == 42
+        assert (t.method.__frame__.result == [42]).all()
+
+    def test_framable_generator_function(self):
+
+        @framed()
+        def count(n: int):
+            for i in range(n):
+                yield i * 10
+
+        gen = count(3)
+        assert inspect.isgenerator(gen)
+        # nothing is recorded until items are pulled
+        assert len(count._self_trace) == 0
+        assert next(gen) == 0
+        assert len(count._self_trace) == 1
+        assert list(gen) == [10, 20]
+        list(count(2))
+
+        frame = count.__frame__
+        assert (frame.result == [0, 10, 20, 0, 10]).all()
+        assert (frame.call == [0, 0, 0, 1, 1]).all()
+        assert (frame.step == [0, 1, 2, 0, 1]).all()
+        assert (frame.n == [3, 3, 3, 2, 2]).all()
+
+        @framed()
+        def echo():
+            received = yield "ready"
+            while True:
+                received = yield received
+
+        gen = echo()
+        assert next(gen) == "ready"
+        assert gen.send(42) == 42
+        gen.close()
+        assert list(echo.__frame__.result) == ["ready", 42]
+
+    def test_framable_generator_function_maxlen(self):
+
+        @framed(maxlen=10)
+        def count(n: int):
+            yield from range(n)
+
+        assert sum(count(100000)) == sum(range(100000))
+        assert len(count.__frame__) == 10
+        assert (count.__frame__.step == list(range(99990, 100000))).all()
+
+    def test_framable_function_spill(self):
+
+        with tempfile.TemporaryDirectory() as spilldir:
+
+            @framed(spill=spilldir, spill_after=4)
+            def inc(a: int, b: str = "b") -> int:
+                return a + 1
+
+            for a in range(10):
+                inc(a)
+
+            assert inc._self_trace.spilled == 8  # the last 2 calls are still in memory
+            assert (inc.__frame__.a == list(range(10))).all()
+            assert (inc.__frame__.result == list(range(1, 11))).all()
+            assert (inc.__frame__.b == "b").all()
+            assert (inc.__frame__.index == list(range(10))).all()
+            assert inc.__frame__.result.dtype == np.int64  # annotated result is stored raw
+            inc._self_trace.spill()
+            assert isinstance(inc.__frame__.a.values, np.memmap)
+            assert isinstance(inc.__frame__.result.values, np.memmap)
+
+            class Traced:
+                @framed(spill=spilldir, spill_after=2)
+                def method(self, a: int = 39):
+                    return a + 2
+
+            t, u = Traced(), Traced()
+            for a in range(3):
+                t.method(a)
+                u.method(a + 10)
+            assert (t.method.__frame__.a == [0, 1, 2]).all()
+            assert (u.method.__frame__.result == [12, 13, 14]).all()
+
+        with self.assertRaises(ValueError):
+            framed(maxlen=3, spill=True)(function_test)
+
+    def test_framable_function_pure(self):
+        calls = []
+
+        @framed(pure=True)
+        def inc(a: int) -> int:
+            calls.append(a)
+            return a + 1
+
+        assert [inc(1), inc(2), inc(1), inc(a=1)] == [2, 3, 2, 2]
+        assert calls == [1, 2]  # cached calls are not made
+        assert inc.__frame__.a.tolist() == [1, 2]  # nor recorded
+        assert inc.__cache__.frame.to_dict("records") == [
+            {"hits": 2, "misses": 2, "evictions": 0, "expirations": 0, "size": 2}
+        ]
+
+        @framed(pure=FramableCache(maxsize=1))
+        def first(seq):
+            return seq[0]
+
+        assert [first((1, 2)), first((3,)), first((1, 2)), first([4]), first([4])] == [1, 3, 1, 4, 4]
+        assert first.__cache__.evictions == 2
+        assert len(first.__frame__) == 5  # unhashable arguments are not cached
+
+        class Traced:
+            def __init__(self, b):
+                self.b = b
+
+            @framed(pure=True)
+            def add(self, a):
+                return a + self.b
+
+        t, u = Traced(1), Traced(2)
+        assert [t.add(1), u.add(1), t.add(1)] == [2, 3, 2]  # the instance is in the argtuple, so in the key
+        assert t.add.__cache__.hits == 1
+        assert t.add.__frame__.a.tolist() == [1]
+
+        with self.assertRaises(TypeError):
+            @framed(pure=True)
+            async def coro():
+                pass
+
+    def test_framable_function_trace(self):
+
+        @framed()
+        def add(a: int, b: int = 1) -> int:
+            return a + b
+
+        @framed()
+        def inc(a: int) -> int:
+            return a + 1
+
+        for a in range(1000):
+            add(a)
+            inc(a)
+        add(3, b=2)
+
+        assert add.__trace__[(3, 1)] == 4
+        assert add.__trace__[add._self_argtuple(3, 2)] == 5
+        assert (3, 2) in add.__trace__
+        assert (3, 3) not in add.__trace__
+        assert inc.__trace__[48] == 49  # a single parameter is looked up by its value
+        assert 1000 not in inc.__trace__
+        assert add.__trace__.take([(3, 1), (3, 2)]).result.tolist() == [4, 5]
+        assert inc.__trace__.between(10, 12).result.tolist() == [11, 12, 13]
+
+        class Traced:
+            @framed()
+            def method(self, a: int = 39):
+                return a + 2
+
+        t, u = Traced(), Traced()
+        t.method(1)
+        u.method(2)
+        assert t.method.__trace__[1] == 3
+        assert 2 not in t.method.__trace__  # only calls of this instance
+        assert list(u.method.__trace__) == [2]
+
+    def test_framable_function_trace_bounded(self):
+
+        class Traced:
+            @framed(maxlen=10)
+            def method(self, a: int = 39):
+                return a + 2
+
+        first = Traced()
+        ref = weakref.ref(first)
+        first.method(1)
+        assert first.method.__trace__[1] == 3
+        del first
+        for a in range(3000):  # lookups through per-instance views prune the shared index
+            t = Traced()
+            t.method(a)
+            assert t.method.__trace__[a] == a + 2
+        index = vars(Traced)["method"]._self_index
+        assert index._size <= 2 * 10 + 1024 + 1
+        gc.collect()
+        assert ref() is None  # evicted instances are not kept alive by the index
+
+    def test_framable_function_timing(self):
+
+        @framed(timing=True, cputime=True, sample=EverySampler(1))
+        def alloc(n: int) -> list:
+            return [0] * n
+
+        alloc(10)
+        alloc(n=1000)
+        frame = alloc.__frame__
+        assert frame.columns.tolist() == ["n", "result", "start", "duration", "cputime", "weight", "thread"]
+        assert (frame.duration > 0).all()
+        assert (frame.cputime >= 0).all()
+        assert frame.start.is_monotonic_increasing
+
+        if not tracemalloc.is_tracing():
+            self.addCleanup(tracemalloc.stop)  # started by memory=True, slowing down all allocations
+
+        class Traced:
+            @framed(memory=True)
+            def alloc(self, n: int) -> list:
+                return [0] * n
+
+        t = Traced()
+        t.alloc(10000)
+        assert t.alloc.__frame__.allocated.iloc[0] >= 10000 * 8  # the list is kept, as the result
+        assert t.alloc.__frame__.columns.tolist() == ["n", "result", "start", "duration", "allocated", "thread"]
+
+        with self.assertRaises(TypeError):
+            @framed(timing=True)
+            def gen():
+                yield 1
+
+    def test_framable_function_exceptions(self):
+
+        @framed(exceptions=True, timing=True, pure=True)
+        def div(a: int, b: int) -> float:
+            return a / b
+
+        assert div(1, 2) == 0.5
+        for _ in range(2):
+            with self.assertRaises(ZeroDivisionError):
+                div(1, 0)
+
+        frame = div.__frame__
+        assert len(frame) == 3  # failed calls are recorded, not cached
+        assert frame.exception.dtype == "category"
+        assert frame.exception.tolist()[1:] == [ZeroDivisionError] * 2
+        assert frame.exception.isna()[0]
+        assert frame.message.tolist() == [None, "division by zero", "division by zero"]
+        assert frame.result.isna().tolist() == [False, True, True]
+        assert (frame.duration > 0).all()
+
+        class Traced:
+            @framed(exceptions="traceback")
+            def fail(self, a):
+                raise ValueError(a)
+
+        t = Traced()
+        with self.assertRaises(ValueError):
+            t.fail("bad")
+        assert t.fail.__frame__.message.tolist() == ["bad"]
+        assert "ValueError: bad" in t.fail.__frame__.traceback[0]
+
+        @framed(exceptions=True)
+        async def afail(a):
+            if a:
+                raise KeyError(a)
+            return a
+
+        async def calls():
+            await afail(0)
+            with self.assertRaises(KeyError):
+                await afail(1)
+
+        asyncio.run(calls())
+        assert afail.__frame__.exception.tolist()[1] is KeyError
+        assert afail.__frame__.columns.tolist() == ["a", "result", "start", "end", "exception", "message", "thread"]
+
+        @framed()
+        def fail():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            fail()
+        assert len(fail.__frame__) == 0  # not recorded, unless exceptions are captured
+
+    def test_framable_function_calltree(self):
+
+        @framed(calltree=True)
+        def leaf(a: int) -> int:
+            return a
+
+        @framed(calltree=True, sample=EverySampler(1))
+        def node(a: int) -> int:
+            return leaf(a) + leaf(a + 1)
+
+        @framed(calltree=True)
+        async def anode(a):
+            results = await asyncio.gather(asub(a), asub(a + 1))
+            return sum(results)
+
+        @framed(calltree=True, exceptions=True)
+        async def asub(a):
+            await asyncio.sleep(0)
+            return node(a)
+
+        node(1)
+        asyncio.run(anode(10))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(node, [20, 30]))
+
+        tree = calltree(leaf, node, anode, asub)
+        assert len(tree) == 3 + 1 + 2 * 4 + 2 * 3
+        assert tree.index.is_unique
+        roots = tree[tree.parent.isna()]
+        assert roots.function.tolist() == [node.__qualname__, anode.__qualname__] + [node.__qualname__] * 2
+        assert (roots.depth == 0).all()
+        # each leaf is a child of a node, at the depth below it
+        leaves = tree[tree.function == leaf.__qualname__]
+        parents = tree.loc[leaves.parent]
+        assert (parents.function == node.__qualname__).all()
+        assert (leaves.depth.values == parents.depth.values + 1).all()
+        # asyncio tasks are children of the call that created them, with their own children
+        subs = tree[tree.function == asub.__qualname__]
+        assert (tree.loc[subs.parent].function == anode.__qualname__).all()
+        assert sorted(tree[tree.parent.isin(subs.index)].a) == [10, 11]
+
+        with self.assertRaises(TypeError):
+            @framed(calltree=True)
+            def gen():
+                yield 1
+
+    def test_framable_function_enabled(self):
+        self.addCleanup(framableswitch.enable)
+
+        @framed(enabled=False)
+        def inc(a: int) -> int:
+            return a + 1
+
+        class MyKls:
+            @framed()
+            def double(self, a: int) -> int:
+                return 2 * a
+
+        obj = MyKls()
+        assert inc(1) == 2
+        assert len(inc.__frame__) == 0 and not inc.__enabled__
+        inc.__enabled__ = True
+        assert inc(2) == 3
+        assert inc.__frame__.a.tolist() == [2]
+        assert not hasattr(inc.__wrapped__, "__enabled__")  # set on the wrapper, not on the function
+
+        # switched from the bound method, for all instances
+        obj.double.__enabled__ = False
+        assert MyKls().double(1) == 2
+        assert len(MyKls.double.__frame__) == 0
+        MyKls.double.__enabled__ = True
+        obj.double(2)
+        assert MyKls.double.__frame__.a.tolist() == [2]
+
+        # disabled for the whole process, whatever the function switch
+        framableswitch.disable()
+        assert inc(3) == 4
+        assert obj.double(3) == 6
+        assert len(inc.__frame__) == 1 and len(MyKls.double.__frame__) == 1
+        framableswitch.enable()
+        inc(4)
+        assert inc.__frame__.a.tolist() == [2, 4]
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,115 @@
+import types
+import unittest
+
+from framable.framableinstrument import instrument, uninstrument
+
+SOURCE = '''
+import os.path
+from os.path import join  # imported, not instrumented
+
+def inc(a: int) -> int:
+    return a + 1
+
+def _dec(a: int) -> int:
+    return a - 1
+
+class Geometry:
+    def __init__(self, scale: int = 1):
+        self.scale = scale
+
+    def area(self, w: int, h: int) -> int:
+        return self.scale * w * h
+
+    @staticmethod
+    def perimeter(w: int, h: int) -> int:
+        return 2 * (w + h)
+
+    @classmethod
+    def unit(cls, n: int) -> int:
+        return n
+'''
+
+
+def _module():
+    module = types.ModuleType("instrumented")
+    exec(SOURCE, module.__dict__)
+    return module
+
+
+class TestInstrument(unittest.TestCase):
+
+    def test_instrument_module(self):
+        module = _module()
+        original = module.inc
+        instrumentation = instrument(module, exclude=("__*__", "_*"))
+        assert set(instrumentation.functions) == {"inc", "Geometry.area", "Geometry.perimeter", "Geometry.unit"}
+        assert module.join is not None and not hasattr(module.join, "__frame__")
+        assert not hasattr(module._dec, "__frame__")
+
+        assert module.inc(41) == 42
+        g = module.Geometry(scale=2)
+        assert g.area(2, 3) == 12
+        assert module.Geometry.perimeter(2, 3) == 10
+        assert module.Geometry.unit(7) == 7
+
+        frames = instrumentation.frames
+        assert frames["inc"].result.tolist() == [42]
+        assert frames["Geometry.area"].result.tolist() == [12]
+        assert frames["Geometry.perimeter"].result.tolist() == [10]
+        assert frames["Geometry.unit"].result.tolist() == [7]
+
+        # disabled at runtime, functions are called directly
+        instrumentation.disable()
+        assert module.inc(1) == 2
+        assert g.area(1, 1) == 2
+        assert len(module.inc.__frame__) == 1
+        assert len(module.Geometry.area.__frame__) == 1
+        instrumentation.enable()
+        assert module.inc(2) == 3
+        assert len(module.inc.__frame__) == 2
+
+        with self.assertRaises(ValueError):
+            instrument(module)
+
+        uninstrument(module)
+        assert module.inc is original
+        assert not hasattr(module.Geometry.area, "__frame__")
+        assert module.Geometry.perimeter(1, 1) == 4
+        with self.assertRaises(ValueError):
+            uninstrument(module)
+
+    def test_instrument_class(self):
+        module = _module()
+        instrumentation = instrument(module.Geometry, include="Geometry.a*", enabled=False, timing=True)
+        assert set(instrumentation.functions) == {"Geometry.area"}
+        assert not hasattr(module.inc, "__frame__")
+
+        g = module.Geometry()
+        g.area(2, 3)
+        assert len(module.Geometry.area.__frame__) == 0
+        instrumentation.enable()
+        g.area(2, 3)
+        assert "duration" in module.Geometry.area.__frame__.columns
+        assert len(module.Geometry.area.__frame__) == 1
+
+        uninstrument(module.Geometry)
+        assert not hasattr(module.Geometry.area, "__frame__")
+
+    def test_instrument_failure_restores(self):
+        module = types.ModuleType("failing")
+        exec("def a(x: int) -> int:\n    return x\n\nasync def b(x: int) -> int:\n    return x\n", module.__dict__)
+        original = module.a
+        with self.assertRaises(TypeError):  # async functions cannot be timed
+            instrument(module, timing=True)
+        assert module.a is original
+        with self.assertRaises(ValueError):
+            uninstrument(module)
+        # once failed, it can be instrumented with other options
+        instrumentation = instrument(module)
+        assert set(instrumentation.functions) == {"a", "b"}
+        uninstrument(module)
+        assert module.a is original
+
+
+if __name__ == "__main__":
+    unittest.main()
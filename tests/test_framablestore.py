@@ -0,0 +1,66 @@
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from framable.core.framablemeta import FramableMeta
+from framable.framablefunctionwrapper import framed
+from framable.framablestore import load_frame, save_frame
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "saving frames needs pyarrow")
+class TestFramableStore(unittest.TestCase):
+
+    def test_save_load_function(self):
+
+        @framed()
+        def inc(a: int, b: object = None) -> int:
+            return a + 1
+
+        inc(41)
+        inc(50, b={"some": "object"})
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ("inc.parquet", "inc.feather"):
+                path = os.path.join(tmpdir, name)
+                save_frame(inc, path, chunksize=1)
+                frame = load_frame(path)
+                assert frame.a.dtype == "int64"
+                assert frame.result.dtype == "int64"
+                assert frame.b.tolist() == [None, {"some": "object"}]
+                assert (frame.index == inc.__frame__.index).all()
+                assert (frame.columns == inc.__frame__.columns).all()
+
+    def test_save_load_class(self):
+
+        class MyKls(metaclass=FramableMeta):
+            att1: int = 0
+            att2: str = "dflt"
+            att3: bool = False
+
+        MyKls(att1=42, att3=True)
+        MyKls.from_columns({"att1": [None, 3]})
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "mykls.data")
+            save_frame(MyKls, path, format="parquet")
+            frame = load_frame(path, format="parquet")
+            assert frame.att1.dtype == "Int64"  # None is missing, the other values are still integers
+            assert frame.att1.isna().tolist() == [False, True, False]
+            assert frame.att2.tolist() == ["dflt"] * 3
+            assert frame.att3.tolist() == [True, False, False]
+
+            # plain frames, with a custom encoder
+            frame = pd.DataFrame({"a": [{1}, {2}]})
+            save_frame(frame, path, format="feather", encoder=lambda v: json.dumps(list(v)).encode())
+            assert load_frame(path, format="feather", decoder=lambda b: set(json.loads(b))).a.tolist() == [{1}, {2}]
+
+            with self.assertRaises(ValueError):
+                save_frame(MyKls, path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+import pandas as pd
+
+from framable.framabletiming import percentiles, slowest
+from framable.framablefunctionwrapper import framed
+
+
+class TestFramableTiming(unittest.TestCase):
+
+    def test_percentiles(self):
+        frame = pd.DataFrame({"a": [1, 1, 1, 2], "duration": [10, 20, 30, 100]})
+        summary = percentiles(frame, by="a", q=(0.5, 1.0))
+        assert summary.loc[1].tolist() == [20, 30, 3]
+        assert summary.loc[2].tolist() == [100, 100, 1]
+        assert percentiles(frame, q=(0.5,)).iloc[0].tolist() == [25, 4]
+
+    def test_slowest(self):
+
+        @framed(timing=True)
+        def inc(a: int) -> int:
+            return a + 1
+
+        for a in range(10):
+            inc(a)
+
+        top = slowest(inc, k=3)
+        assert len(top) == 3
+        assert top.duration.is_monotonic_decreasing
+        assert top.duration.iloc[-1] >= inc.__frame__.duration.nsmallest(7).max()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import subprocess
+import sys
+import unittest
+
+MODULES = [
+    "framable",
+    "framable.framablefunctionwrapper",
+    "framable.framableclassproxy",
+    "framable.framableobjectproxy",
+    "framable.framablecollector",
+    "framable.framableinstrument",
+    "framable.framablestore",
+    "framable.framabletiming",
+]
+
+
+def importtime(statement):
+    """ Running statement in a new interpreter, and returning the cumulative import time (us) of each module """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                times[module.strip()] = int(cumulative)
+    return times
+
+
+class TestImport(unittest.TestCase):
+
+    def test_import_without_pandas(self):
+        # decorating and recording doesnt need pandas
+        times = importtime(
+            f"import {', '.join(MODULES)}\n"
+            "@framable.framablefunctionwrapper.framed()\n"
+            "def inc(a: int) -> int:\n"
+            "    return a + 1\n"
+            "inc(41)\n"
+            "class MyKls(metaclass=framable.FramableMeta):\n"
+            "    att1: int = 0\n"
+            "MyKls(att1=42)\n"
+        )
+        assert "pandas" not in times
+        for m in MODULES:
+            print(f"{m}: {times[m]} us")
+
+    def test_import_pandas_on_frame(self):
+        times = importtime(
+            "import framable.framablefunctionwrapper\n"
+            "@framable.framablefunctionwrapper.framed()\n"
+            "def inc(a: int) -> int:\n"
+            "    return a + 1\n"
+            "inc(41)\n"
+            "inc.__frame__\n"
+        )
+        assert "pandas" in times
+
+
+if __name__ == "__main__":
+    unittest.main()